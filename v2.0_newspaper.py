@@ -1,47 +1,1023 @@
 from abc import ABC, abstractmethod
 import requests
-from bs4 import BeautifulSoup
-from pyppeteer import launch
+from bs4 import BeautifulSoup, SoupStrainer
 import asyncio
 import json
 import os
 import re
 import time
-import spacy
 from collections import Counter
-from datetime import datetime
-import locale
+from datetime import datetime, date
 import csv
 import unicodedata
-import tkinter as tk
-from tkinter import filedialog
-from nltk.corpus import stopwords
-import nltk
+import threading
+import hashlib
+import gzip
+import sqlite3
+import importlib.util
+import statistics
+import argparse
+import sys
+import functools
+import contextlib
+import http.server
+import random
+import email.utils
+import calendar
+import math
+from array import array
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlparse, urlunparse, urlencode, unquote
+# spaCy, NLTK, tkinter, pyppeteer y httpx se importan la primera vez que se usan,
+# para que la línea de comandos y los procesos de CPU arranquen rápido y sin pantalla
 try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
 
 
 os.environ["PYPPETEER_CHROMIUM_REVISION"] = "none"
 os.environ["PYPPETEER_DOWNLOADS_FOLDER"] = "none"
 os.environ["PYPPETEER_BROWSER_EXECUTABLE"] = r"C:\\Program Files (x86)\\Microsoft\\Edge\\Application\\msedge.exe"
-locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
+
+# Máximo de artículos descargándose al mismo tiempo por dominio
+DOMAIN_LIMITS = {
+    "eluniversal.com.mx": 4,
+    "jornada.com.mx": 4,
+    "milenio.com": 4,
+    # Copias del Wayback Machine (--wayback); el CDX y las copias comparten este límite
+    "web.archive.org": 2
+}
+DEFAULT_DOMAIN_LIMIT = 2
+# Hasta dónde puede crecer ese límite mientras el sitio responda bien
+MAX_DOMAIN_LIMIT = 16
+
+# Tiempo máximo de conexión y de lectura de cada descarga, en segundos
+REQUEST_TIMEOUT = (10, 30)
+# Respuestas que se reintentan; 429 y 503 indican además que hay que bajar el ritmo
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+# Conexiones abiertas que se conservan por host para reutilizarlas entre artículos
+HTTP_POOL_SIZE = MAX_DOMAIN_LIMIT
+
+# Recursos que no hacen falta para leer los resultados de búsqueda
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+# Dominios de publicidad y analítica que se bloquean en el navegador
+BLOCKED_DOMAINS = (
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "amazon-adsystem.com",
+    "facebook.net", "facebook.com", "connect.facebook.net", "twitter.com", "platform.twitter.com",
+    "taboola.com", "outbrain.com", "scorecardresearch.com", "chartbeat.com", "chartbeat.net",
+    "criteo.com", "criteo.net", "adnxs.com", "rubiconproject.com", "pubmatic.com", "openx.net",
+    "hotjar.com", "newrelic.com", "nr-data.net", "onesignal.com", "quantserve.com", "teads.tv",
+    "smartadserver.com", "seedtag.com", "logora.fr"
+)
+
+# Índice de países, estados y municipios usado para normalizar ubicaciones
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.json")
+# Páginas de artículos sintéticas (<sitio>_<n>.html) con el marcado que lee cada parse_article,
+# para medir el rendimiento sin red; no son capturas de los sitios
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Parsers de HTML disponibles, del más lento al más rápido
+PARSER_BACKENDS = ["html.parser"]
+if importlib.util.find_spec("lxml"):
+    PARSER_BACKENDS.append("lxml")
+if SelectolaxParser is not None:
+    PARSER_BACKENDS.append("selectolax")
+# Constructor de árbol para BeautifulSoup; selectolax solo recorta el HTML antes de pasárselo
+SOUP_BUILDER = "lxml" if "lxml" in PARSER_BACKENDS else "html.parser"
+DEFAULT_PARSER_BACKEND = PARSER_BACKENDS[-1]
+
+def _accent_table():
+    # Tabla para str.translate equivalente a quitar las marcas diacríticas de la forma NFD
+    table = {cp: None for cp in range(0x300, 0x370)}
+    for cp in list(range(0xC0, 0x250)) + list(range(0x1E00, 0x1F00)):
+        stripped = ''.join(
+            c for c in unicodedata.normalize('NFD', chr(cp))
+            if unicodedata.category(c) != 'Mn'
+        )
+        if stripped != chr(cp):
+            table[cp] = stripped
+    return table
+
+ACCENT_TABLE = _accent_table()
+WORD_RE = re.compile(r'\b\w+\b')
+
+# Componentes de spaCy necesarios para extraer ubicaciones
+NER_COMPONENTS = ["ner"]
+SPACY_MODEL = "es_core_news_md"
+
+# Carga única de los recursos pesados aunque varios hilos los pidan a la vez
+_resources_lock = threading.Lock()
+
+# Meses en español, sin acentos, con sus abreviaturas habituales
+MESES = {
+    "enero": 1, "ene": 1, "febrero": 2, "feb": 2, "marzo": 3, "mar": 3, "abril": 4, "abr": 4,
+    "mayo": 5, "may": 5, "junio": 6, "jun": 6, "julio": 7, "jul": 7, "agosto": 8, "ago": 8,
+    "septiembre": 9, "setiembre": 9, "sept": 9, "sep": 9, "set": 9, "octubre": 10, "oct": 10,
+    "noviembre": 11, "nov": 11, "diciembre": 12, "dic": 12,
+}
+# "2025-04-24T17:15:00.000Z" y variantes: solo importa la parte de la fecha
+ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})")
+# "24/04/2025", "24-04-2025", "24.04.2025"
+NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b")
+# "24 de abril de 2025 17:15", "miércoles 24 abr. 2025", "24-abr-2025"
+SPANISH_DATE_RE = re.compile(r"\b(\d{1,2})(?:\s+de\s+|[\s.-]+)([a-z]{3,10})\.?(?:\s+de\s+|\s+del\s+|[\s,.-]+)(\d{4})\b")
+# "abril 24, 2025", "abr. 24 de 2025"
+SPANISH_MONTH_FIRST_RE = re.compile(r"\b([a-z]{3,10})\.?\s+(\d{1,2}),?(?:\s+de\s+|\s+)(\d{4})\b")
+
+@functools.lru_cache(maxsize=8192)
+def parse_fecha(fecha_str):
+    """Date of an ISO, dd/mm/aaaa or Spanish text date ("24 de abril de 2025 17:15", "24 abr. 2025").
+
+    Does not depend on the system locale; returns None when no date is recognized.
+    Memoized, since the same dates repeat a lot within a crawl.
+    """
+    if not fecha_str:
+        return None
+    text = fecha_str.strip()
+    match = ISO_DATE_RE.match(text)
+    if match:
+        year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    else:
+        match = NUMERIC_DATE_RE.search(text)
+        if match:
+            day, month, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        else:
+            text = text.lower().translate(ACCENT_TABLE)
+            match = SPANISH_DATE_RE.search(text)
+            if match and match.group(2) in MESES:
+                day, month, year = int(match.group(1)), MESES[match.group(2)], int(match.group(3))
+            else:
+                match = SPANISH_MONTH_FIRST_RE.search(text)
+                if not match or match.group(1) not in MESES:
+                    return None
+                day, month, year = int(match.group(2)), MESES[match.group(1)], int(match.group(3))
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+class Metrics:
+    """Counters and latency histograms per site and stage, exported as JSON and Prometheus text.
+
+    Safe to update from the fetch threads. CPU worker processes fill their own instance and
+    send back snapshot(), which the main process adds with merge().
+    """
+
+    # Límites superiores de los buckets de latencia, en milisegundos
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}    # (site, name) -> n
+        self.errors = {}      # (site, stage, error_type) -> n
+        self.histograms = {}  # (site, stage) -> {"buckets": [...], "count", "sum", "max"}
+
+    def inc(self, site, name, amount=1):
+        with self._lock:
+            self.counters[(site, name)] = self.counters.get((site, name), 0) + amount
+
+    def error(self, site, stage, error):
+        error_type = type(error).__name__ if isinstance(error, BaseException) else str(error)
+        with self._lock:
+            key = (site, stage, error_type)
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def observe(self, site, stage, ms):
+        with self._lock:
+            histogram = self.histograms.get((site, stage))
+            if histogram is None:
+                histogram = self.histograms[(site, stage)] = {
+                    "buckets": [0] * len(self.BUCKETS_MS), "count": 0, "sum": 0.0, "max": 0.0
+                }
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if ms <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["count"] += 1
+            histogram["sum"] += ms
+            histogram["max"] = max(histogram["max"], ms)
+
+    @contextlib.contextmanager
+    def time(self, site, stage):
+        """Observe the duration of the with block; also works around awaits."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(site, stage, (time.perf_counter() - start) * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "errors": dict(self.errors),
+                "histograms": {key: dict(value, buckets=list(value["buckets"])) for key, value in self.histograms.items()},
+            }
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, n in snapshot["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + n
+            for key, n in snapshot["errors"].items():
+                self.errors[key] = self.errors.get(key, 0) + n
+            for key, other in snapshot["histograms"].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    self.histograms[key] = dict(other, buckets=list(other["buckets"]))
+                    continue
+                histogram["buckets"] = [a + b for a, b in zip(histogram["buckets"], other["buckets"])]
+                histogram["count"] += other["count"]
+                histogram["sum"] += other["sum"]
+                histogram["max"] = max(histogram["max"], other["max"])
+
+    def summary(self):
+        """Nested {site: {"counters", "errors", "stages"}} dict for the JSON report."""
+        snapshot = self.snapshot()
+        sites = {}
+
+        def site_entry(site):
+            return sites.setdefault(site, {"counters": {}, "errors": {}, "stages": {}})
+
+        for (site, name), n in sorted(snapshot["counters"].items()):
+            site_entry(site)["counters"][name] = n
+        for (site, stage, error_type), n in sorted(snapshot["errors"].items()):
+            site_entry(site)["errors"].setdefault(stage, {})[error_type] = n
+        for (site, stage), histogram in sorted(snapshot["histograms"].items()):
+            count = histogram["count"]
+            site_entry(site)["stages"][stage] = {
+                "count": count,
+                "total_ms": round(histogram["sum"], 3),
+                "mean_ms": round(histogram["sum"] / count, 3) if count else 0.0,
+                "max_ms": round(histogram["max"], 3),
+                "buckets_ms": dict(zip(map(str, self.BUCKETS_MS), histogram["buckets"])),
+            }
+        return sites
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, ensure_ascii=False, indent=2)
+
+    def prometheus_text(self, prefix="newspaper"):
+        snapshot = self.snapshot()
+
+        def labels(**values):
+            escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values.values())
+            return "{" + ",".join(f'{name}="{value}"' for name, value in zip(values, escaped)) + "}"
+
+        lines = []
+        for name in sorted({name for _, name in snapshot["counters"]}):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for (site, counter), n in sorted(snapshot["counters"].items()):
+                if counter == name:
+                    lines.append(f"{prefix}_{name}_total{labels(site=site)} {n}")
+        if snapshot["errors"]:
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for (site, stage, error_type), n in sorted(snapshot["errors"].items()):
+                lines.append(f"{prefix}_errors_total{labels(site=site, stage=stage, type=error_type)} {n}")
+        if snapshot["histograms"]:
+            metric = f"{prefix}_stage_duration_ms"
+            lines.append(f"# TYPE {metric} histogram")
+            for (site, stage), histogram in sorted(snapshot["histograms"].items()):
+                cumulative = 0
+                for bound, n in zip(self.BUCKETS_MS, histogram["buckets"]):
+                    cumulative += n
+                    lines.append(f"{metric}_bucket{labels(site=site, stage=stage, le=bound)} {cumulative}")
+                lines.append(f"{metric}_bucket{labels(site=site, stage=stage, le='+Inf')} {histogram['count']}")
+                lines.append(f"{metric}_sum{labels(site=site, stage=stage)} {histogram['sum']:.3f}")
+                lines.append(f"{metric}_count{labels(site=site, stage=stage)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        # Se escribe aparte y se renombra para que el recolector nunca lea un archivo a medias
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+class FetchError(Exception):
+    """HTTP error response for an article page, with the server's Retry-After in seconds if any."""
+
+    def __init__(self, url, status, retry_after=None):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status in RETRY_STATUSES
+
+    @property
+    def throttled(self):
+        return self.status in THROTTLE_STATUSES
+
+    @staticmethod
+    def parse_retry_after(value):
+        """Seconds to wait from a Retry-After header, given as seconds or as an HTTP date."""
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, when.timestamp() - time.time())
+
+
+class AdaptiveRateLimiter:
+    """AIMD concurrency limit for one domain, shared by every crawl of the run.
+
+    Each successful response raises the limit by about one request per round of requests;
+    a throttling response (429/503 or a timeout) halves it and pauses the whole domain for
+    the backoff delay, at least the Retry-After the server asked for.
+    """
+
+    def __init__(self, initial=DEFAULT_DOMAIN_LIMIT, minimum=1, maximum=MAX_DOMAIN_LIMIT,
+                 max_retries=4, base_delay=1.0, max_delay=60.0):
+        self.minimum = minimum
+        self.maximum = max(maximum, initial)
+        self.limit = float(initial)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    # Se suelta el lock mientras dura la pausa del dominio
+                    self._condition.release()
+                    try:
+                        await asyncio.sleep(pause)
+                    finally:
+                        await self._condition.acquire()
+                    continue
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                await self._condition.wait()
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    def on_throttle(self, delay):
+        now = time.monotonic()
+        # Una sola reducción por pausa: las respuestas que ya estaban en curso no cuentan
+        if now >= self.paused_until:
+            self.limit = max(self.minimum, self.limit / 2)
+        self.paused_until = max(self.paused_until, now + delay)
+
+    async def run(self, function, *args, on_retry=None):
+        """Await function(*args) within the limit, retrying transient failures up to max_retries times.
+
+        on_retry(attempt, error, delay, throttled) is called before each wait.
+        """
+        attempt = 0
+        while True:
+            await self.acquire()
+            try:
+                result = await function(*args)
+            except Exception as e:
+                await self.release()
+                throttled, retryable, retry_after = self.classify(e)
+                if not retryable or attempt >= self.max_retries:
+                    if throttled:
+                        self.on_throttle(self.backoff_delay(attempt, retry_after))
+                    raise
+                delay = self.backoff_delay(attempt, retry_after)
+                if throttled:
+                    self.on_throttle(delay)
+                if on_retry is not None:
+                    on_retry(attempt, e, delay, throttled)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            await self.release()
+            self.on_success()
+            return result
+
+    @staticmethod
+    def classify(error):
+        """(throttled, retryable, retry_after) for an exception raised by a fetch."""
+        if isinstance(error, FetchError):
+            return error.throttled, error.retryable, error.retry_after
+        if isinstance(error, requests.exceptions.Timeout):
+            return True, True, None
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return False, True, None
+        return False, False, None
+
+
+class HttpClient:
+    """Keep-alive HTTP client shared by every scraper, with a connection pool per host.
+
+    Uses a requests Session by default, or httpx with HTTP/2 when http2=True and the
+    httpx[http2] extra is installed. Accept-Encoding only lists the encodings that can
+    be decoded here (gzip and deflate, plus br with brotli installed).
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, http2=False, timeout=REQUEST_TIMEOUT):
+        self.timeout = timeout
+        self.http2 = http2 and all(importlib.util.find_spec(name) for name in ("httpx", "h2"))
+        if http2 and not self.http2:
+            print("HTTP/2 needs httpx[http2]; using HTTP/1.1")
+        self.accept_encoding = requests.utils.DEFAULT_ACCEPT_ENCODING
+        if self.http2:
+            import httpx
+            self._httpx = httpx
+            connect, read = timeout
+            self._client = httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=pool_size),
+            )
+        else:
+            self._client = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=len(DOMAIN_LIMITS) + 1, pool_maxsize=pool_size)
+            self._client.mount("https://", adapter)
+            self._client.mount("http://", adapter)
+
+    def get(self, url, headers=None):
+        headers = dict(headers or {})
+        headers["Accept-Encoding"] = self.accept_encoding
+        if not self.http2:
+            return self._client.get(url, headers=headers, timeout=self.timeout)
+        # Se traducen los errores de httpx a los de requests, que son los que reintenta el limitador
+        try:
+            return self._client.get(url, headers=headers)
+        except self._httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except self._httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def close(self):
+        self._client.close()
+
+
+class ResponseCache:
+    """On-disk cache of article pages keyed by URL hash, with TTL, LRU size limit and conditional revalidation."""
+
+    def __init__(self, directory="V1.0_http_cache", ttl=30 * 24 * 3600, max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        # ttl=None: nunca se revalida, útil para reprocesar el corpus sin red
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, "
+                "fetched_at REAL, accessed_at REAL, size INTEGER)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".gz")
+
+    def get(self, url):
+        """Return the cached entry for url (body, etag, last_modified, fresh) or None."""
+        key = self.key_for(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, fetched_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            with gzip.open(self._path(key), "rt", encoding="utf-8") as file:
+                body = file.read()
+        except (OSError, EOFError):
+            self._delete(key)
+            return None
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        etag, last_modified, fetched_at = row
+        fresh = self.ttl is None or now - fetched_at < self.ttl
+        return {"body": body, "etag": etag, "last_modified": last_modified, "fresh": fresh}
+
+    def contains(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM entries WHERE key = ?", (self.key_for(url),)
+            ).fetchone() is not None
+
+    def urls(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM entries")]
+
+    def put(self, url, body, etag=None, last_modified=None):
+        key = self.key_for(url)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Se escribe a un temporal y se renombra para no dejar archivos a medias
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+            file.write(body)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._total += size - (row[0] if row else 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, etag, last_modified, fetched_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (key, url, etag, last_modified, now, now, size)
+            )
+        self._evict()
+
+    def touch(self, url):
+        """Mark an entry as revalidated (the server answered 304)."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, self.key_for(url))
+            )
+
+    def _delete(self, key):
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._total -= row[0]
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        # Se borran las entradas menos usadas recientemente hasta quedar bajo max_bytes
+        while self._total > self.max_bytes:
+            with self._lock:
+                row = self._conn.execute("SELECT key FROM entries ORDER BY accessed_at LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._delete(row[0])
+
+    def fetch(self, url, get, headers=None):
+        """Return the page body, using the cache and If-None-Match / If-Modified-Since when stale."""
+        entry = self.get(url)
+        if entry and entry["fresh"]:
+            return entry["body"]
+
+        headers = dict(headers or {})
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = get(url, headers=headers)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            # Solo sin respuesta del servidor se usa la copia vieja; un 429/503 sigue al limitador
+            if entry:
+                print(f"Using stale cached copy of {url}: {e}")
+                return entry["body"]
+            raise
+        except FetchError as e:
+            # La nota ya no existe: no se vuelve a servir desde el caché
+            if entry and e.status in (404, 410):
+                self._delete(self.key_for(url))
+            raise
+
+        if entry and response.status_code == 304:
+            self.touch(url)
+            return entry["body"]
+        if response.status_code == 200:
+            self.put(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return response.text
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BrowserPool:
+    """Headless browser launched once per run that hands out pages to the scrapers."""
+
+    def __init__(self, max_pages=4, max_uses=20, launch_options=None, block_resources=True):
+        self.max_pages = max_pages
+        self.max_uses = max_uses
+        self.block_resources = block_resources
+        self.launch_options = launch_options or {
+            'executablePath': os.environ["PYPPETEER_BROWSER_EXECUTABLE"],
+            'headless': True,
+            'args': ['--no-sandbox', '--disable-setuid-sandbox']
+        }
+        self._browser = None
+        self._idle = []
+        self._uses = {}
+        self._semaphore = None
+        self._lock = None
+
+    async def _ensure_browser(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+        async with self._lock:
+            if self._browser is None:
+                from pyppeteer import launch
+                self._browser = await launch(**self.launch_options)
+                self._browser.on('disconnected', self._on_disconnected)
+        return self._browser
+
+    def _on_disconnected(self, *args):
+        # El navegador se cerró o tronó: se vuelve a lanzar en el siguiente acquire
+        if self._browser is not None:
+            print("Browser disconnected, it will be relaunched")
+        self._browser = None
+        self._idle = []
+        self._uses = {}
+
+    async def acquire(self):
+        """Return a page from the pool, opening a new tab if none is idle."""
+        await self._ensure_browser()
+        await self._semaphore.acquire()
+        return await self._open_page()
+
+    async def try_acquire(self):
+        """Like acquire, but return None at once instead of waiting when every tab is in use."""
+        await self._ensure_browser()
+        if self._semaphore.locked():
+            return None
+        await self._semaphore.acquire()
+        return await self._open_page()
+
+    async def _open_page(self):
+        # Se llama con el semáforo ya tomado; se libera si no se pudo abrir la pestaña
+        try:
+            while self._idle:
+                page = self._idle.pop()
+                if not page.isClosed():
+                    return page
+                self._uses.pop(id(page), None)
+            browser = await self._ensure_browser()
+            page = await browser.newPage()
+            self._uses[id(page)] = 0
+            if self.block_resources:
+                await self._configure_page(page)
+            return page
+        except Exception:
+            self._semaphore.release()
+            raise
+
+    @staticmethod
+    def should_block(resource_type, url):
+        """True for images, media, fonts and anything served by ad or tracking domains."""
+        if resource_type in BLOCKED_RESOURCE_TYPES:
+            return True
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == domain or host.endswith("." + domain) for domain in BLOCKED_DOMAINS)
+
+    async def _configure_page(self, page):
+        await page.setRequestInterception(True)
+        page.on('request', lambda request: asyncio.ensure_future(self._filter_request(request)))
+
+    @staticmethod
+    async def _filter_request(request):
+        try:
+            if BrowserPool.should_block(request.resourceType, request.url):
+                await request.abort()
+            else:
+                await request.continue_()
+        except Exception:
+            # La página se cerró o navegó antes de resolver la petición
+            pass
+
+    async def release(self, page, crashed=False):
+        """Give a page back; it is closed after max_uses or if it failed."""
+        try:
+            uses = self._uses.get(id(page), 0) + 1
+            self._uses[id(page)] = uses
+            if crashed or uses >= self.max_uses or self._browser is None or page.isClosed():
+                self._uses.pop(id(page), None)
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            else:
+                # Limpiar lo que haya dejado el scraper anterior
+                await page.setExtraHTTPHeaders({})
+                await page.goto('about:blank')
+                self._idle.append(page)
+        except Exception as e:
+            print(f"Error releasing page: {str(e)}")
+            self._uses.pop(id(page), None)
+        finally:
+            self._semaphore.release()
+
+    async def close(self):
+        browser = self._browser
+        self._browser = None
+        self._idle = []
+        self._uses = {}
+        if browser:
+            await browser.close()
+
+
+class Gazetteer:
+    """Inverted index of place names (normalized alias -> city/state/country) with O(1) lookups."""
+
+    def __init__(self):
+        self.index = {}
+
+    @staticmethod
+    def normalize(name):
+        # Sin acentos, minúsculas y sin puntos: "Edo. Méx." -> "edo mex"
+        name = ''.join(
+            c for c in unicodedata.normalize('NFD', name)
+            if unicodedata.category(c) != 'Mn'
+        )
+        return " ".join(name.lower().replace(".", "").split())
+
+    def add_country(self, alias, country):
+        self.index[self.normalize(alias)] = ("country", None, None, country)
+
+    def add_state(self, alias, state, country):
+        key = self.normalize(alias)
+        if self.index.get(key, ("",))[0] != "country":
+            self.index[key] = ("state", None, state, country)
+
+    def add_municipality(self, name, state, country):
+        key = self.normalize(name)
+        current = self.index.get(key)
+        if current is None:
+            self.index[key] = ("city", name, state, country)
+        elif current[0] == "city" and current[2] != state:
+            # Municipio con el mismo nombre en varios estados: no se puede inferir el estado
+            self.index[key] = ("city", name, None, country if current[3] == country else None)
+
+    def lookup(self, name):
+        """Return (kind, city, state, country) for a place name, or None."""
+        return self.index.get(self.normalize(name))
+
+    @classmethod
+    def from_tables(cls, country_aliases, states_by_country, state_abbrevs):
+        gazetteer = cls()
+        for country, states in states_by_country.items():
+            for state in states:
+                gazetteer.add_state(state, state, country)
+        for abbrevs in state_abbrevs.values():
+            for abbrev, state in abbrevs.items():
+                for country, states in states_by_country.items():
+                    if state in states:
+                        gazetteer.add_state(abbrev, state, country)
+        for alias, country in country_aliases.items():
+            gazetteer.add_country(alias, country)
+        return gazetteer
+
+    def load(self, path):
+        """Extend the index with a JSON file of countries, states and municipalities."""
+        if not os.path.exists(path):
+            print(f"Gazetteer file {path} not found, using built-in tables")
+            return self
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+
+        for country, aliases in data.get("countries", {}).items():
+            for alias in [country] + aliases:
+                self.add_country(alias, country)
+        state_country = {}
+        for country, states in data.get("states", {}).items():
+            for state, aliases in states.items():
+                state_country[state] = country
+                for alias in [state] + aliases:
+                    self.add_state(alias, state, country)
+        for state, municipalities in data.get("municipalities", {}).items():
+            for municipality in municipalities:
+                self.add_municipality(municipality, state, state_country.get(state, "México"))
+        return self
+
+    def load_municipalities_csv(self, path, state_column="NOM_ENT", municipality_column="NOM_MUN"):
+        """Add every municipality of a catalogue CSV (e.g. INEGI's AGEEML)."""
+        with open(path, newline='', encoding='utf-8') as csvfile:
+            for row in csv.DictReader(csvfile):
+                entry = self.lookup(row[state_column])
+                if entry and entry[0] == "state":
+                    state, country = entry[2], entry[3]
+                elif self.normalize(row[state_column]) == "mexico":
+                    # El catálogo llama "México" al Estado de México
+                    state, country = "Estado de México", "México"
+                else:
+                    continue
+                self.add_municipality(row[municipality_column].strip(), state, country)
+        return self
+
+
+class DateWindow:
+    """Range of publication dates to keep, checked as early as possible.
+
+    Links whose URL path carries a date (/2024/04/24/, /2024-04-24, /2024/04/) outside the
+    window are dropped before downloading; the rest are checked right after parsing, before
+    NER and tokenization. start and end are dates or "dd/mm/aaaa"; None leaves that side open.
+    """
+
+    URL_DATE_RE = re.compile(
+        r"/((?:19|20)\d{2})[/-](0[1-9]|1[0-2])(?:[/-](0[1-9]|[12]\d|3[01]))?(?=[/_.-]|$)"
+    )
+
+    def __init__(self, start=None, end=None):
+        self.start = self._as_date(start)
+        self.end = self._as_date(end)
+
+    @staticmethod
+    def _as_date(value):
+        if value is None or isinstance(value, date):
+            return value.date() if isinstance(value, datetime) else value
+        day = parse_fecha(value)
+        if day is None:
+            raise ValueError(f"Unrecognized date: {value!r}")
+        return day
+
+    def __repr__(self):
+        return f"DateWindow({self.start}, {self.end})"
+
+    def overlaps(self, first, last):
+        return (self.start is None or last >= self.start) and (self.end is None or first <= self.end)
+
+    def contains(self, day):
+        return self.overlaps(day, day)
+
+    def contains_fecha(self, fecha):
+        """Whether a dd/mm/aaaa fecha from parse_article is in the window; raises ValueError if malformed."""
+        day = parse_fecha(fecha)
+        if day is None:
+            raise ValueError(f"Unrecognized date: {fecha!r}")
+        return self.contains(day)
+
+    @classmethod
+    def url_dates(cls, url):
+        """(first, last) possible publication days according to the URL path, or None."""
+        match = cls.URL_DATE_RE.search(urlparse(url).path)
+        if not match:
+            return None
+        year, month = int(match.group(1)), int(match.group(2))
+        if match.group(3):
+            try:
+                day = date(year, month, int(match.group(3)))
+            except ValueError:
+                return None
+            return day, day
+        return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+    def may_contain_url(self, url):
+        dates = self.url_dates(url)
+        return dates is None or self.overlaps(*dates)
+
+
+# Hasta ahora solo se conservaban las notas publicadas desde 2016
+DEFAULT_DATE_WINDOW = DateWindow(date(2016, 1, 1))
+
+class TermMatcher:
+    """Counts every occurrence of a list of phrases in one pass over the words of a text.
+
+    Word-level Aho-Corasick automaton compiled once from the terms (e.g. Términos.csv).
+    Terms and texts are compared lowercased and without accents, so "Violencia de Género"
+    counts for the term "violencia de genero"; overlapping terms are all counted.
+    """
+
+    def __init__(self, terms):
+        self.terms = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for term in terms:
+            words = BaseScraper.tokenize(term)
+            if words:
+                self._add(words)
+        self._build()
+
+    def _add(self, words):
+        state = 0
+        for word in words:
+            next_state = self._goto[state].get(word)
+            if next_state is None:
+                next_state = self._goto[state][word] = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        phrase = " ".join(words)
+        if phrase not in self._output[state]:
+            self._output[state].append(phrase)
+            self.terms.append(phrase)
+
+    def _build(self):
+        # Enlaces de fallo por niveles: el sufijo más largo que también es prefijo de algún término
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(word, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(BaseScraper.cargar_terminos(path))
+
+    def count(self, words):
+        """{term: occurrences} in a list of words from BaseScraper.tokenize; terms not found are omitted."""
+        goto, fail, output = self._goto, self._fail, self._output
+        counts = Counter()
+        state = 0
+        for word in words:
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for phrase in output[state]:
+                counts[phrase] += 1
+        return counts
+
+    def count_text(self, text):
+        return self.count(BaseScraper.tokenize(text))
+
 
 class BaseScraper(ABC):
     """Base class for web scrapers."""
     
-    def __init__(self, base_url):
+    # Partes de la página de un artículo que usa parse_article: SoupStrainer para
+    # BeautifulSoup y selectores CSS para selectolax. None = página completa.
+    PARSE_ONLY = None
+    TARGET_SELECTORS = None
+    # Cabeceras que se envían al descargar las notas del sitio
+    HEADERS = {}
+    # Nombre del sitio en SITES, usado como etiqueta de las métricas
+    SITE = None
+    # Dominio y patrón (expresión regular completa) de las URLs de notas que se buscan en el CDX
+    WAYBACK_DOMAIN = None
+    ARTICLE_URL_RE = None
+
+    def __init__(self, base_url, browser_pool=None, response_cache=None, parser_backend=None, targeted_parsing=True,
+                 metrics=None, http_client=None, date_window=None):
         self.base_url = base_url
+        self.date_window = date_window or DEFAULT_DATE_WINDOW
+        self._http_client = http_client
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.browser_pool = browser_pool or BrowserPool()
+        self.response_cache = response_cache
+        self.parser_backend = parser_backend or DEFAULT_PARSER_BACKEND
+        self.targeted_parsing = targeted_parsing
+
+    def make_soup(self, html, targeted=None):
+        """Parse html with the configured backend, keeping only the article's needed subtrees if targeted."""
+        if targeted is None:
+            targeted = self.targeted_parsing
+        backend = self.parser_backend
+        if backend == "selectolax":
+            if targeted and self.TARGET_SELECTORS:
+                # selectolax localiza los nodos y BeautifulSoup solo procesa ese fragmento
+                tree = SelectolaxParser(html)
+                html = "".join(node.html for selector in self.TARGET_SELECTORS for node in tree.css(selector))
+            backend = SOUP_BUILDER
+        parse_only = self.PARSE_ONLY if targeted else None
+        return BeautifulSoup(html, backend, parse_only=parse_only)
     
     @staticmethod
-    def cargar_terminos():
-        root = tk.Tk()
-        root.withdraw()  # Oculta la ventana principal de tkinter
-        archivo = filedialog.askopenfilename(
-            title="Selección de archivo CSV",  
-            filetypes=[("CSV Files", "*.csv")]  # Solo permite archivos CSV
-        )
+    def cargar_terminos(archivo=None):
+        """Read the search terms from the TERMINOS column of a CSV; without archivo, ask for it in a dialog."""
+        if archivo is None:
+            import tkinter as tk
+            from tkinter import filedialog
+            root = tk.Tk()
+            root.withdraw()  # Oculta la ventana principal de tkinter
+            archivo = filedialog.askopenfilename(
+                title="Selección de archivo CSV",  
+                filetypes=[("CSV Files", "*.csv")]  # Solo permite archivos CSV
+            )
+            root.destroy()
         
         palabras_objetivo = []
         
@@ -60,26 +1036,11 @@ class BaseScraper(ABC):
     
     @staticmethod
     def normalizar_fecha(fecha_str):
-        fecha_str = fecha_str.strip()
-        if fecha_str.endswith("Z"):
-            fecha_str = fecha_str.replace("Z", "")
-
-        #Formato ISO
-        try:
-            fecha = datetime.fromisoformat(fecha_str)
-            return fecha.strftime('%d/%m/%Y')
-        except ValueError:
-            pass
-
-        #Formato tipo "24 de abril de 2025 17:15"
-        try:
-            fecha_str = re.sub(r'\s+\d{1,2}:\d{2}.*', '', fecha_str)
-            fecha = datetime.strptime(fecha_str, "%d de %B de %Y")
-            return fecha.strftime('%d/%m/%Y')
-        except ValueError:
-            pass
-
-        return fecha_str
+        """Date as dd/mm/aaaa; the original string if it is not a recognizable date."""
+        fecha = parse_fecha(fecha_str)
+        if fecha is None:
+            return fecha_str.strip()
+        return fecha.strftime('%d/%m/%Y')
     
     @staticmethod
     def codigo_pais(country):
@@ -93,20 +1054,41 @@ class BaseScraper(ABC):
     
     @staticmethod
     def quitar_acentos(texto):
-        return ''.join(
-        c for c in unicodedata.normalize('NFD', texto)
-        if unicodedata.category(c) != 'Mn'
-    )
+        return texto.translate(ACCENT_TABLE)
+
+    _stop_words = None
+
+    @staticmethod
+    def get_stop_words():
+        """Spanish stopwords, lowercased and without accents, built only once."""
+        if BaseScraper._stop_words is None:
+            with _resources_lock:
+                if BaseScraper._stop_words is None:
+                    import nltk
+                    try:
+                        nltk.data.find('corpora/stopwords')
+                    except LookupError:
+                        nltk.download('stopwords')
+                    from nltk.corpus import stopwords
+                    # + stopwords.words('english')
+                    BaseScraper._stop_words = frozenset(
+                        BaseScraper.quitar_acentos(word.lower()) for word in stopwords.words('spanish')
+                    )
+        return BaseScraper._stop_words
     
     @staticmethod
-    #def word_count(full_description, palabras_objetivo):
-    def word_count(full_description):
-        texto_normalizado = BaseScraper.quitar_acentos(full_description.lower())
+    def tokenize(text):
+        """Words of text, lowercased and without accents, stopwords included."""
+        return WORD_RE.findall(BaseScraper.quitar_acentos(text.lower()))
 
-        words = re.findall(r'\b\w+\b', texto_normalizado.lower())
-        stop_words = set(stopwords.words('spanish'))# + stopwords.words('english'))
-        filtered_words = [word for word in words if word not in stop_words]
-        word_counts = Counter(filtered_words)
+    @staticmethod
+    #def word_count(full_description, palabras_objetivo):
+    def word_count(full_description, words=None):
+        # words: el texto ya separado con tokenize, para no recorrerlo dos veces
+        if words is None:
+            words = BaseScraper.tokenize(full_description)
+        stop_words = BaseScraper.get_stop_words()
+        word_counts = Counter(word for word in words if word not in stop_words)
         
         # Contamos las ocurrencias solo para las palabras de 'palabras_objetivo'
         #conteo_filtrado = {palabra: word_counts.get(palabra, 0) for palabra in palabras_objetivo}
@@ -114,7 +1096,18 @@ class BaseScraper(ABC):
         #return conteo_filtrado
         return word_counts
 
-    nlp = spacy.load("es_core_news_md")
+    _nlp = None
+
+    @staticmethod
+    def get_nlp():
+        """spaCy model, loaded on the first call."""
+        if BaseScraper._nlp is None:
+            with _resources_lock:
+                if BaseScraper._nlp is None:
+                    import spacy
+                    # Solo se usa doc.ents, así que el resto del pipeline (parser, lematizador, etc.) se desactiva
+                    BaseScraper._nlp = spacy.load(SPACY_MODEL, enable=NER_COMPONENTS)
+        return BaseScraper._nlp
 
     # Abreviaciones comunes de estados mexicanos
     estado_abrevs = {
@@ -157,70 +1150,274 @@ class BaseScraper(ABC):
         "USA": "Estados Unidos", "United States": "Estados Unidos", "EE.UU.": "Estados Unidos",
         "France": "Francia", "España": "España", "Germany": "Alemania"
     }
+
+    _gazetteer = None
+
     @staticmethod
-    def extract_location_with_nlp(text):
-            doc = BaseScraper.nlp(text)
-            city = None
-            state = None
-            country = None
+    def get_gazetteer():
+        """Place index built from the tables above plus GAZETTEER_FILE, on the first call."""
+        if BaseScraper._gazetteer is None:
+            with _resources_lock:
+                if BaseScraper._gazetteer is None:
+                    BaseScraper._gazetteer = Gazetteer.from_tables(
+                        BaseScraper.country_aliases, BaseScraper.states_by_country, BaseScraper.state_abbrevs
+                    ).load(GAZETTEER_FILE)
+        return BaseScraper._gazetteer
 
+    @staticmethod
+    def _locations_from_doc(doc):
+            gazetteer = BaseScraper.get_gazetteer()
             locations = {"city": None, "state": None, "country": None}
             for ent in doc.ents:
                 #print(ent.text, ent.label_)
                 if ent.label_ in ("GPE", "LOC"):
                     ent_text = ent.text.strip()
+                    place = gazetteer.lookup(ent_text)
 
-                    # Normalizar país
-                    if ent_text in BaseScraper.country_aliases:
-                        locations["country"] = BaseScraper.country_aliases[ent_text]
+                    if place is None:
+                        # Ciudad
+                        if not locations["city"] and locations["state"] and ent_text != locations["state"]:
+                            locations["city"] = ent_text
+                        continue
 
-                    # Normalizar estado
-                    for country, states in BaseScraper.states_by_country.items():
-                        if ent_text in states:
-                            locations["state"] = ent_text
+                    kind, city, state, country = place
+                    # Normalizar país
+                    if kind == "country":
+                        locations["country"] = country
+
+                    # Normalizar estado (también abreviaturas)
+                    elif kind == "state":
+                        locations["state"] = state
+                        locations["country"] = country
+
+                    # Municipio: da la ciudad y, si aún no se conoce, el estado
+                    else:
+                        if not locations["city"]:
+                            locations["city"] = city
+                        if not locations["state"] and state:
+                            locations["state"] = state
                             locations["country"] = country
 
-                    # Abreviaturas
-                    for country_code, abbrevs in BaseScraper.state_abbrevs.items():
-                        if ent_text in abbrevs:
-                            locations["state"] = abbrevs[ent_text]
-                            for full_name, states in BaseScraper.states_by_country.items():
-                                if abbrevs[ent_text] in states:
-                                    locations["country"] = full_name
+            return locations
 
-                    # Ciudad
-                    if not locations["city"] and locations["state"] and ent_text != locations["state"]:
-                        locations["city"] = ent_text
+    @staticmethod
+    def extract_location_with_nlp(text):
+        return BaseScraper._locations_from_doc(BaseScraper.get_nlp()(text))
 
-            return locations
+    @staticmethod
+    def extract_locations_batch(texts, batch_size=32, n_process=1):
+        """Run NER over many texts at once with nlp.pipe; n_process > 1 spreads the batches over cores."""
+        docs = BaseScraper.get_nlp().pipe(texts, batch_size=batch_size, n_process=n_process)
+        return [BaseScraper._locations_from_doc(doc) for doc in docs]
+
+    async def report_page(self, on_page, page_number, links, is_last, page_count=None):
+        """Tell the caller (e.g. the crawl checkpoint) that a results page was read.
+
+        page_count is the number of results pages of the search, when known. on_page is a
+        coroutine function; awaiting it holds the search back while the extraction pipeline
+        has no room for more links.
+        """
+        if page_number is not None:
+            self.metrics.inc(self.SITE, "pages_visited")
+            self.metrics.inc(self.SITE, "links_found", len(links))
+        if on_page is not None:
+            await on_page(page_number, links, is_last, page_count)
+
+    def timed(self, stage):
+        return self.metrics.time(self.SITE, stage)
+
+    def record_error(self, stage, error):
+        self.metrics.error(self.SITE, stage, error)
+
+    @property
+    def http_client(self):
+        # Los scrapers de los procesos de CPU no descargan nada: el cliente se crea solo si hace falta
+        if self._http_client is None:
+            self._http_client = HttpClient()
+        return self._http_client
+
+    def http_get(self, url, headers=None):
+        """GET url with the site's HEADERS, raising FetchError for error responses."""
+        response = self.http_client.get(url, headers={**self.HEADERS, **(headers or {})})
+        if response.status_code >= 400:
+            raise FetchError(url, response.status_code,
+                             FetchError.parse_retry_after(response.headers.get("Retry-After")))
+        return response
+
+    def cached(self, article_url):
+        """Body of article_url if the response cache holds a fresh copy, else None."""
+        if self.response_cache is None:
+            return None
+        entry = self.response_cache.get(article_url)
+        return entry["body"] if entry and entry["fresh"] else None
+
+    def fetch(self, article_url):
+        if self.response_cache is not None:
+            return self.response_cache.fetch(article_url, self.http_get)
+        response = self.http_get(article_url)
+        return response.text
+
+    @abstractmethod
+    def parse_article(self, article_url, html):
+        """Return identifier, text, fecha and diario of an article page."""
+        pass
+
+    @staticmethod
+    def build_article(parsed, locations, matcher=None):
+        country = locations['country'] or "México"
+        code = BaseScraper.codigo_pais(country)
+
+        #tokens = BaseScraper.word_count(parsed["text"], palabras_objetivo)
+        words = BaseScraper.tokenize(parsed["text"])
+        tokens = BaseScraper.word_count(parsed["text"], words)
+        article_info = {
+            # Sin identificador en la página no hay ID: la nota no se compara con las demás por ID
+            "ID_noticia": f"{code}{parsed['identifier']}" if parsed["identifier"] is not None else None,
+            "token": tokens,
+            "fecha": parsed["fecha"],
+            "diario": parsed["diario"],
+            "país": country,
+            "ubicación_noticia": locations['state']
+        }
+        # Frases de la lista de términos (TermMatcher) y cuántas veces aparecen
+        if matcher is not None:
+            article_info["términos"] = matcher.count(words)
+        return article_info
+
+    def extract_article_data(self, article_url):
+        parsed = self.parse_article(article_url, self.fetch(article_url))
+        # Las notas fuera del rango de fechas regresan None sin pasar por NER ni conteo de palabras
+        if not self.date_window.contains_fecha(parsed["fecha"]):
+            return None
+        locations = BaseScraper.extract_location_with_nlp(parsed["text"])
+        return BaseScraper.build_article(parsed, locations)
 
 class ElUniversalScraper(BaseScraper):
     """Scraper for El Universal."""
 
+    SITE = "el_universal"
+    WAYBACK_DOMAIN = "eluniversal.com.mx"
+    # Sección (o sección/año/mes/día en las notas viejas) y un slug largo
+    ARTICLE_URL_RE = r"https?://(?:www\.)?eluniversal\.com\.mx(?::\d+)?/(?:[a-z0-9-]+/)+[a-z0-9-]{30,}/?"
+
     HEADERS = {
     "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
     "Accept-Encoding": "gzip, deflate, br, zstd",
     "Accept-Language": "es-419,es;q=0.9,es-ES;q=0.8,en;q=0.7,en-GB;q=0.6,en-US;q=0.5,es-MX;q=0.4",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36 Edg/132.0.0.0"
     }
+
+    # Metadatos en <script> (fusion-metadata y dataLayer) y párrafos de la nota
+    PARSE_ONLY = SoupStrainer(["script", "p"])
+    TARGET_SELECTORS = ["script", 'p[itemprop="description"]']
+
+    # "direct" abre las páginas de resultados por URL en varias pestañas a la vez;
+    # "click" recorre las páginas con el botón siguiente, una por una
+    PAGINATION = "direct"
+    PARALLEL_PAGES = 3
+    PAGE_URL = "{base_url}/buscador/?query={query}&page={page}"
+
+    FIRST_RESULT_JS = '''() => {
+        const link = document.querySelector('a[onmousedown]');
+        return link ? link.getAttribute('href') : null;
+    }'''
+    RESULTS_CHANGED_JS = '''(previous) => {
+        const link = document.querySelector('a[onmousedown]');
+        return !!link && link.getAttribute('href') !== previous && !!document.querySelector('a.next_btn, div.result_count');
+    }'''
+
+    async def _read_results_page(self, page, url):
+        """Load the results page url in page and return its article links."""
+        with self.timed("navigation"):
+            await page.goto(url, timeout=90000)
+            await page.waitForSelector("a[onmousedown]", {'timeout': 30000})
+        soup = self.make_soup(await page.content(), targeted=False)
+        links = soup.find_all('a', href=True, onmousedown=True)
+        return [self.base_url + link['href'] for link in links]
+
+    async def _read_pages_direct(self, page, search_query, read_pages, last_page, first_page_links, on_page):
+        """Read result pages 2..last_page not in read_pages concurrently by URL.
+
+        The tab already in use keeps reading pages while up to PARALLEL_PAGES - 1 more are
+        borrowed from the pool only when it has free tabs: a job never waits for a tab while
+        holding one, so jobs filling the whole pool cannot deadlock each other.
+        Returns None when the site ignores the page parameter, so the caller falls back to clicking.
+        """
+        page_numbers = [number for number in range(2, last_page + 1) if number not in read_pages]
+        if not page_numbers:
+            await self.report_page(on_page, None, [], True, last_page)
+            return []
+
+        def page_url(number):
+            return self.PAGE_URL.format(base_url=self.base_url, query=search_query, page=number)
+
+        # Se prueba la primera página: si repite los resultados de la 1, la URL no sirve
+        probe = page_numbers[0]
+        try:
+            probe_links = await self._read_results_page(page, page_url(probe))
+        except Exception as e:
+            self.record_error("navigation", e)
+            print(f"Direct pagination failed ({str(e)}), falling back to clicking")
+            return None
+        if not probe_links or set(probe_links) == set(first_page_links):
+            print("Direct pagination not supported, falling back to clicking")
+            return None
+        print(f"Reading page {probe}")
+        await self.report_page(on_page, probe, probe_links, False, last_page)
+
+        results = {probe: probe_links}
+        pending = page_numbers[1:]
+
+        async def read(number, tab):
+            print(f"Reading page {number}")
+            try:
+                links = await self._read_results_page(tab, page_url(number))
+            except Exception as e:
+                self.record_error("navigation", e)
+                print(f"Error processing page {number}: {str(e)}")
+                return False
+            results[number] = links
+            await self.report_page(on_page, number, links, False, last_page)
+            return True
+
+        async def own_reader():
+            while pending:
+                await read(pending.pop(0), page)
+
+        async def borrowed_reader():
+            while pending:
+                # Se pide la pestaña antes de tomar una página: si no hay libre, la propia sigue leyendo
+                tab = await self.browser_pool.try_acquire()
+                if tab is None:
+                    return
+                ok = True
+                try:
+                    # Otro lector pudo terminar la cola mientras se abría la pestaña
+                    if pending:
+                        ok = await read(pending.pop(0), tab)
+                finally:
+                    await self.browser_pool.release(tab, crashed=not ok)
+
+        await asyncio.gather(own_reader(), *(borrowed_reader() for _ in range(self.PARALLEL_PAGES - 1)))
+        # Si falló alguna página la búsqueda queda sin terminar y se relee en la siguiente ejecución
+        if len(results) == len(page_numbers):
+            await self.report_page(on_page, None, [], True, last_page)
+        return [link for number in sorted(results) for link in results[number]]
     
-    async def get_article_links(self, search_query):
+    async def get_article_links(self, search_query, read_pages=(), on_page=None):
         search_query = search_query.replace(" ", "+")
         search_url = f"{self.base_url}/buscador/?query={search_query}"
         #print(search_url)
-        browser = None
+        page = None
+        crashed = False
         all_links = []
         try:
-            browser = await launch(
-                executablePath=os.environ["PYPPETEER_BROWSER_EXECUTABLE"],
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            page = await browser.newPage()
-            await page.goto(search_url, timeout=90000)
+            page = await self.browser_pool.acquire()
+            with self.timed("navigation"):
+                await page.goto(search_url, timeout=90000)
 
             result = await page.content()
-            soup = BeautifulSoup(result, 'html.parser')
+            soup = self.make_soup(result, targeted=False)
             
             pages = soup.find('div', class_="result_count")
             if not pages:
@@ -235,20 +1432,38 @@ class ElUniversalScraper(BaseScraper):
                 
             result_number = int(match.group(1))
             each_page_results = 20
-            next_pages = max(1, round(result_number / each_page_results))
+            next_pages = max(1, math.ceil(result_number / each_page_results))
             #next_pages = 2
             print(f"Found {result_number} results across {next_pages} pages")
-            print("Reading page 1")
             links = soup.find_all('a', href=True, onmousedown=True)
-            all_links.extend([self.base_url + link['href'] for link in links])
-
-            if next_pages > 1:
+            first_page_links = [self.base_url + link['href'] for link in links]
+            if 1 not in read_pages:
+                print("Reading page 1")
+                all_links.extend(first_page_links)
+                await self.report_page(on_page, 1, first_page_links, next_pages == 1, next_pages)
+
+            direct_links = None
+            if next_pages > 1 and self.PAGINATION == "direct":
+                direct_links = await self._read_pages_direct(
+                    page, search_query, read_pages, next_pages, first_page_links, on_page
+                )
+                if direct_links is None:
+                    # La prueba navegó fuera de la página 1; se vuelve a ella para paginar con clics
+                    await page.goto(search_url, timeout=90000)
+
+            if direct_links is not None:
+                all_links.extend(direct_links)
+            elif next_pages > 1:
                 for _ in range(next_pages - 1): 
-                    print(f"Reading page {_+2}") 
+                    page_number = _ + 2
+                    if page_number not in read_pages:
+                        print(f"Reading page {page_number}") 
                     try:
                         next_button = await page.querySelector("a.next_btn")
                         if not next_button:
                             print("No next button found")
+                            # La búsqueda tenía menos páginas de las calculadas
+                            await self.report_page(on_page, None, [], True, page_number - 1)
                             break
 
                         is_visible = await page.evaluate('(element) => element.offsetParent !== null', next_button)
@@ -256,32 +1471,43 @@ class ElUniversalScraper(BaseScraper):
                             print("Next button is not visible")
                             break
                         
-                        await next_button.click()
-                        await page.waitForSelector("a.next_btn", {'timeout': 120000})  
-                        await asyncio.sleep(3)
+                        # Esperar a que la lista de resultados cambie en lugar de un tiempo fijo
+                        first_href = await page.evaluate(self.FIRST_RESULT_JS)
+                        with self.timed("navigation"):
+                            await next_button.click()
+                            await page.waitForFunction(self.RESULTS_CHANGED_JS, {'timeout': 120000}, first_href)
+                        # Páginas ya leídas en una ejecución anterior: solo se avanza
+                        if page_number in read_pages:
+                            continue
 
                         content = await page.content()
-                        soup = BeautifulSoup(content, 'html.parser')
+                        soup = self.make_soup(content, targeted=False)
                         links = soup.find_all('a', href=True, onmousedown=True)
-                        all_links.extend([self.base_url + link['href'] for link in links])
+                        page_links = [self.base_url + link['href'] for link in links]
+                        all_links.extend(page_links)
+                        await self.report_page(
+                            on_page, page_number, page_links, page_number == next_pages, next_pages
+                        )
                         
                     except Exception as e:
+                        self.record_error("navigation", e)
                         print(f"Error processing page: {str(e)}")
                         break
 
         except Exception as e:
+            self.record_error("navigation", e)
             print(f"Error during scraping: {str(e)}")
+            crashed = True
             return []
             
         finally:
-            if browser:
-                await browser.close()
+            if page:
+                await self.browser_pool.release(page, crashed)
                 
         return all_links
     
-    def extract_article_data(self, article_url):
-        response = requests.get(article_url)
-        soup = BeautifulSoup(response.text, "html.parser")
+    def parse_article(self, article_url, html):
+        soup = self.make_soup(html)
         #with open("el_universal_soup.txt", "a", encoding="utf-8") as f:
         #    f.write("\n==================================================== Nuevo Soup ====================================================\n")
         #    f.write(soup.prettify())
@@ -304,30 +1530,16 @@ class ElUniversalScraper(BaseScraper):
         )
 
         full_description = f"{titulo}. {descripcion}. {descripcion_completa}".strip()
-
-        locations = BaseScraper.extract_location_with_nlp(full_description)
-        country = locations['country'] or "México"
-        code = BaseScraper.codigo_pais(country)
         content_id = data.get('content_elements', [{}])[0].get('_id')
 
-        #tokens = BaseScraper.word_count(full_description, palabras_objetivo)
-        tokens = BaseScraper.word_count(full_description)
         #fecha = data.get('created_date') <--- Si fue modificado, aparece esta fecha.
         fecha = data.get('display_date') #<--- Fecha mostrada en la publicación del artículo
-        fecha_normal = BaseScraper.normalizar_fecha(fecha)
-        fecha_obj = datetime.strptime(fecha_normal, "%d/%m/%Y")
-        if fecha_obj.year <2016:
-            return
-        else:
-            article_info = {
-                "ID_noticia": f"{code}{content_id}",
-                "token": tokens,
-                "fecha": fecha_normal,
-                "diario": "El universal",
-                "pais": country,
-                "ubicación_noticia": locations['state']
-            }
-            return article_info
+        return {
+            "identifier": content_id,
+            "text": full_description,
+            "fecha": BaseScraper.normalizar_fecha(fecha),
+            "diario": "El universal"
+        }
     
     def get_page_keys(script_tag):
         if not script_tag:
@@ -343,25 +1555,30 @@ class ElUniversalScraper(BaseScraper):
 
 class LaJornadaScraper(BaseScraper):
     """Scraper for La Jornada."""
+
+    SITE = "la_jornada"
+    WAYBACK_DOMAIN = "jornada.com.mx"
+    ARTICLE_URL_RE = r"https?://(?:www\.)?jornada\.com\.mx(?::\d+)?/(?:noticia/)?\d{4}/\d{2}/\d{2}/[^?#]+"
+
+    # JSON-LD, contenedor de la nota (fecha y cuerpo) y el div con el identificador
+    PARSE_ONLY = SoupStrainer(["script", "div"])
+    TARGET_SELECTORS = ['script[type="application/ld+json"]', "div#middle", "div#content_nitf", "div[data-widget-id]"]
     
-    async def get_article_links(self, search_query):
+    async def get_article_links(self, search_query, read_pages=(), on_page=None):
         search_query = search_query.replace(" ", "%20")
         timestamp = int(time.time() * 1000)
         search_url = f"{self.base_url}/search/{search_query}?time={timestamp}"
         #print(search_url)
-        browser = None
+        page = None
+        crashed = False
         all_links = []
         try:
-            browser = await launch(
-                executablePath=os.environ["PYPPETEER_BROWSER_EXECUTABLE"],
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            page = await browser.newPage()
-            await page.goto(search_url, timeout=90000)
+            page = await self.browser_pool.acquire()
+            with self.timed("navigation"):
+                await page.goto(search_url, timeout=90000)
 
             result = await page.content()
-            soup = BeautifulSoup(result, 'html.parser')
+            soup = self.make_soup(result, targeted=False)
             links = soup.select('div#middle.contenedor.contenedor-buscador div.fila a[href]')
             unique_links = set()
             for link in links: 
@@ -369,20 +1586,23 @@ class LaJornadaScraper(BaseScraper):
                 if href and href.startswith('https://') and href not in unique_links:
                     unique_links.add(href)
                     all_links.append(href)
+            # La Jornada muestra todos los resultados en una sola página
+            await self.report_page(on_page, 1, all_links, True, 1)
 
         except Exception as e:
+            self.record_error("navigation", e)
             print(f"Error during scraping: {str(e)}")
+            crashed = True
             return []
             
         finally:
-            if browser:
-                await browser.close()
+            if page:
+                await self.browser_pool.release(page, crashed)
                 
         return all_links
     
-    def extract_article_data(self, article_url):
-        response = requests.get(article_url)
-        soup = BeautifulSoup(response.text, "html.parser")
+    def parse_article(self, article_url, html):
+        soup = self.make_soup(html)
         #with open("la_jornada_soup.txt", "a", encoding="utf-8") as f:
         #    f.write("\n==================================================== Nuevo Soup ====================================================\n")
         #    f.write(soup.prettify())
@@ -403,12 +1623,6 @@ class LaJornadaScraper(BaseScraper):
                          if soup.find("div", id="content_nitf") else [])]
                          )
         full_description = f"{titulo}. {descripcion}. {descripcion_completa}".strip()
-        
-        locations = BaseScraper.extract_location_with_nlp(full_description)
-        country = locations['country'] or "México"
-        code = BaseScraper.codigo_pais(country)
-
-        #print(locations)
 
         id = soup.find('div', {'data-widget-id': True})
         if id:
@@ -416,23 +1630,13 @@ class LaJornadaScraper(BaseScraper):
         else: 
             identifier = None
 
-        #tokens = BaseScraper.word_count(full_description, palabras_objetivo)
-        tokens = BaseScraper.word_count(full_description)
         fecha = date.get_text(strip=True)
-        fecha_normal = BaseScraper.normalizar_fecha(fecha)
-        fecha_obj = datetime.strptime(fecha_normal, "%d/%m/%Y")
-        if fecha_obj.year <2016:
-            return
-        else:
-            article_info = {
-                "ID_noticia": f"{code}{identifier}",
-                "token": tokens,
-                "fecha": fecha_normal,
-                "diario": "La Jornada",
-                "país": country,
-                "ubicación_noticia": locations['state']
-            }
-            return article_info
+        return {
+            "identifier": identifier,
+            "text": full_description,
+            "fecha": BaseScraper.normalizar_fecha(fecha),
+            "diario": "La Jornada"
+        }
     
     def get_page_keys(script_tag):
         for tag in script_tag:
@@ -456,6 +1660,10 @@ class LaJornadaScraper(BaseScraper):
 
 class MilenioScraper(BaseScraper):
     """Scraper for Reforma."""
+
+    SITE = "milenio"
+    WAYBACK_DOMAIN = "milenio.com"
+    ARTICLE_URL_RE = r"https?://(?:www\.)?milenio\.com(?::\d+)?/(?:[a-z0-9-]+/)+[a-z0-9-]{30,}"
     
     HEADERS = {
     "Accept": "image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
@@ -463,33 +1671,44 @@ class MilenioScraper(BaseScraper):
     "Accept-Language": "es-419,es;q=0.9,es-ES;q=0.8,en;q=0.7,en-GB;q=0.6,en-US;q=0.5,es-MX;q=0.4",
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36 Edg/134.0.0.0"
     }
+
+    # JSON-LD con el contenido de la nota y el div de Logora con el identificador
+    PARSE_ONLY = SoupStrainer(["script", "div"])
+    TARGET_SELECTORS = ['script[type="application/ld+json"]', "div.logora_synthese"]
+
+    RESULTS_COUNT_JS = '''() => {
+        const count = document.querySelector('.search-controls__results__count');
+        return !!count && /Milenio:\\s*\\d+/.test(count.textContent);
+    }'''
     
-    async def get_article_links(self, search_query):
+    async def get_article_links(self, search_query, read_pages=(), on_page=None):
         search_query = search_query.replace(" ", "+")
         search_url = f"{self.base_url}/buscador?text={search_query}"
         #print(search_url)
-        browser = None
+        page = None
+        crashed = False
         all_links = []
         try:
-            browser = await launch(
-                executablePath=os.environ["PYPPETEER_BROWSER_EXECUTABLE"],
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            page = await browser.newPage()
+            page = await self.browser_pool.acquire()
             await page.setExtraHTTPHeaders(self.HEADERS)
-            await page.goto(search_url, timeout=90000)
-            await page.waitForSelector('input[name="text"]', {'timeout': 10000})
-
-            #Simular la búsqueda para que muestre los resultados en el sou´p
-            await page.evaluate(f'document.querySelector(\'input[name="text"]\').value = "{search_query}"')
-            await page.click('button[type="submit"].secondary.rounded-soft')
-            await asyncio.sleep(2)
+            with self.timed("navigation"):
+                await page.goto(search_url, timeout=90000)
+                await page.waitForSelector('input[name="text"]', {'timeout': 10000})
+
+                #Simular la búsqueda para que muestre los resultados en el sou´p
+                await page.evaluate(f'document.querySelector(\'input[name="text"]\').value = "{search_query}"')
+                await page.click('button[type="submit"].secondary.rounded-soft')
+                # Esperar a que aparezca el conteo de resultados en lugar de un tiempo fijo
+                try:
+                    await page.waitForFunction(self.RESULTS_COUNT_JS, {'timeout': 30000})
+                except Exception as e:
+                    self.record_error("navigation", e)
+                    print(f"Results count did not appear: {str(e)}")
 
             result = await page.content()
-            soup = BeautifulSoup(result, 'html.parser')
-            with open('resultado_milenio.html', 'w', encoding='utf-8') as file:
-                file.write(soup.prettify())
+            soup = self.make_soup(result, targeted=False)
+            #with open('resultado_milenio.html', 'w', encoding='utf-8') as file:
+            #    file.write(soup.prettify())
 
             pages = soup.select_one('.search-controls__results__count')
             if not pages:
@@ -506,16 +1725,21 @@ class MilenioScraper(BaseScraper):
                 
             result_number = int(match.group(1))
             each_page_results = 10
-            next_pages = max(1, round(result_number / each_page_results))
+            next_pages = max(1, math.ceil(result_number / each_page_results))
             #next_pages = 2
             print(f"Found {result_number} results across {next_pages} pages")
-            print("Reading page 1")
-            links = soup.select('a.board-module__a')
-            all_links.extend([self.base_url + link['href'] for link in links])
+            if 1 not in read_pages:
+                print("Reading page 1")
+                links = soup.select('a.board-module__a')
+                page_links = [self.base_url + link['href'] for link in links]
+                all_links.extend(page_links)
+                await self.report_page(on_page, 1, page_links, next_pages == 1, next_pages)
 
             if next_pages > 1:
                 for _ in range(next_pages - 1): 
-                    print(f"Reading page {_+2}") 
+                    page_number = _ + 2
+                    if page_number not in read_pages:
+                        print(f"Reading page {page_number}") 
                     try:
                         next_button = await page.evaluate('''
                             () => {
@@ -529,8 +1753,12 @@ class MilenioScraper(BaseScraper):
                         ''')
                         if not next_button:
                             print("No next button found")
+                            # La búsqueda tenía menos páginas de las calculadas
+                            await self.report_page(on_page, None, [], True, page_number - 1)
                             break
 
+                        # La espera de la navegación empieza antes del clic para no perderla
+                        navigation = asyncio.ensure_future(page.waitForNavigation({'timeout': 30000}))
                         is_visible = await page.evaluate('''
                             () => {
                                 const buttons = Array.from(document.querySelectorAll('a.board-module__a'));
@@ -546,35 +1774,45 @@ class MilenioScraper(BaseScraper):
                             }
                         ''')
                         if not is_visible:
+                            navigation.cancel()
                             print("Next button is not visible")
                             break
                         
                         #await next_button.click()
-                        await page.waitForNavigation({'timeout': 30000})
-                        #await asyncio.sleep(3)
+                        with self.timed("navigation"):
+                            await navigation
+                        # Páginas ya leídas en una ejecución anterior: solo se avanza
+                        if page_number in read_pages:
+                            continue
 
                         content = await page.content()
-                        soup = BeautifulSoup(content, 'html.parser')
+                        soup = self.make_soup(content, targeted=False)
                         links = soup.select('a.board-module__a')
-                        all_links.extend([self.base_url + link['href'] for link in links])
+                        page_links = [self.base_url + link['href'] for link in links]
+                        all_links.extend(page_links)
+                        await self.report_page(
+                            on_page, page_number, page_links, page_number == next_pages, next_pages
+                        )
                         
                     except Exception as e:
+                        self.record_error("navigation", e)
                         print(f"Error processing page: {str(e)}")
                         break
 
         except Exception as e:
+            self.record_error("navigation", e)
             print(f"Error during scraping: {str(e)}")
+            crashed = True
             return []
             
         finally:
-            if browser:
-                await browser.close()
+            if page:
+                await self.browser_pool.release(page, crashed)
         #print("Links de Milenio: ", all_links)
         return all_links
     
-    def extract_article_data(self, article_url):
-        response = requests.get(article_url)
-        soup = BeautifulSoup(response.text, "html.parser")
+    def parse_article(self, article_url, html):
+        soup = self.make_soup(html)
         #with open("milenio_soup.txt", "a", encoding="utf-8") as f:
         #    f.write("\n==================================================== Nuevo Soup ====================================================\n")
         #    f.write(soup.prettify())
@@ -586,62 +1824,21 @@ class MilenioScraper(BaseScraper):
         descripcion = data[0].get('description')
         cuerpo = data[0].get('articleBody')
 
-
-        content = soup.find("div", class_="content-columns nws")
-        content_date_div = soup.find("div", class_="content-date")
-        section = soup.find("section", class_="content-art-info")
         logora_div = soup.find("div", class_="logora_synthese")
         full_description = f"{titulo}. {descripcion}. {subtitulo}. {cuerpo}".strip()
 
-        locations = BaseScraper.extract_location_with_nlp(full_description)
-       
-        location = None
-        author = None
         identifier = None
-        keywords = []
-        
-
-        if content_date_div:
-            location_span = content_date_div.find("span", class_="location", itemprop="contentLocation")
-            if location_span:
-                location = location_span.get_text(strip=True)
-        
-        country = locations['country'] or "México"
-        code = BaseScraper.codigo_pais(country)
-
-        if section:
-            author_tag = section.find("span", class_="author")
-            if author_tag:
-                author = author_tag.get_text(strip=True)
-        
-
         if logora_div:
+            # <div class="logora_synthese" data-identifier="1935755" data-object-id="logora_config">
             identifier = logora_div.get("data-identifier")
-        
-
-        keyword_links = soup.find_all("a", class_="nd-tags-detail-base__tag", itemprop="keywords")
-        for kw in keyword_links:
-            keyword = kw.get_text(strip=True)
-            if keyword:
-                keywords.append(keyword)
 
-        #tokens = BaseScraper.word_count(full_description, palabras_objetivo)
-        tokens = BaseScraper.word_count(full_description)
         fecha = data[0].get('datePublished')
-        fecha_normal = BaseScraper.normalizar_fecha(fecha)
-        fecha_obj = datetime.strptime(fecha_normal, "%d/%m/%Y")
-        if fecha_obj.year <2016:
-            return
-        else:
-            article_info = {
-                "ID_noticia": f"{code}{identifier}", # <div class="logora_synthese" data-identifier="1935755" data-object-id="logora_config">
-                "token": tokens,
-                "fecha": fecha_normal,
-                "diario": "Milenio",
-                "país": country,
-                "ubicación_noticia": locations['state']
-            }
-            return article_info
+        return {
+            "identifier": identifier,
+            "text": full_description,
+            "fecha": BaseScraper.normalizar_fecha(fecha),
+            "diario": "Milenio"
+        }
     
     def get_page_keys(script_tag):
         if not script_tag:
@@ -660,67 +1857,1645 @@ class MilenioScraper(BaseScraper):
 
 class DynamicScraper:
     """Handles dynamic content loading with pyppeteer."""
+
+    def __init__(self, browser_pool=None):
+        self.browser_pool = browser_pool or BrowserPool()
     
     async def get_dynamic_content(self, url):
-        browser = await launch()
-        page = await browser.newPage()
-        await page.goto(url, {'waitUntil': 'networkidle2'})
-        content = await page.content()
-        await browser.close()
+        page = await self.browser_pool.acquire()
+        crashed = True
+        try:
+            await page.goto(url, {'waitUntil': 'networkidle2'})
+            content = await page.content()
+            crashed = False
+        finally:
+            await self.browser_pool.release(page, crashed)
         return content
 
+class ArticleStore:
+    """Append-only JSON Lines storage, one article per line."""
+
+    def __init__(self, path="V1.0_articles.jsonl"):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            # Si la última escritura quedó a medias se cierra la línea para no corromper la siguiente
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, "rb") as file:
+                    file.seek(-1, os.SEEK_END)
+                    needs_newline = file.read(1) != b"\n"
+                if needs_newline:
+                    with open(self.path, "a", encoding="utf-8") as file:
+                        file.write("\n")
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def append(self, article):
+        """Write one article and flush it to disk."""
+        line = json.dumps(article, ensure_ascii=False)
+        with self._lock:
+            file = self._open()
+            file.write(line + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def __iter__(self):
+        return self.iter_articles()
+
+    def iter_articles(self):
+        """Stream the stored articles back, skipping truncated lines."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line_number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping malformed line {line_number} in {self.path}")
+
+    def import_json(self, json_file):
+        """Copy the articles of a legacy JSON array file into the store."""
+        with open(json_file, "r", encoding="utf-8") as file:
+            articles = json.load(file)
+        count = 0
+        for article in articles:
+            if article:
+                self.append(article)
+                count += 1
+        return count
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SeenIndex:
+    """Persistent SQLite index of article URLs already processed, with the terms that matched them."""
+
+    def __init__(self, path="V1.0_seen.sqlite3"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._in_progress = set()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "url TEXT PRIMARY KEY, site TEXT, article_id TEXT, processed_at TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_id ON articles (article_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_site_id ON articles (site, article_id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS article_terms ("
+                "url TEXT NOT NULL, term TEXT NOT NULL, PRIMARY KEY (url, term))"
+            )
+
+    @staticmethod
+    def normalize_url(url):
+        parts = urlparse(url.strip())
+        return urlunparse((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.params, parts.query, ""))
+
+    def add_terms(self, urls, term):
+        """Record that the search for term returned these URLs."""
+        rows = [(self.normalize_url(url), term) for url in urls]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO article_terms (url, term) VALUES (?, ?)", rows)
+
+    def claim_new(self, urls):
+        """Return the URLs never processed before nor being processed now, without duplicates."""
+        new_urls = []
+        with self._lock:
+            for url in urls:
+                key = self.normalize_url(url)
+                if key in self._in_progress:
+                    continue
+                if self._conn.execute("SELECT 1 FROM articles WHERE url = ?", (key,)).fetchone():
+                    continue
+                self._in_progress.add(key)
+                new_urls.append(url)
+        return new_urls
+
+    def release(self, url):
+        """Forget a claimed URL that failed so that a later run retries it."""
+        with self._lock:
+            self._in_progress.discard(self.normalize_url(url))
+
+    def mark_processed(self, url, site, article_id=None):
+        """Mark url as done; returns False if article_id was already stored from another URL of site."""
+        key = self.normalize_url(url)
+        with self._lock, self._conn:
+            self._in_progress.discard(key)
+            is_new = True
+            # Los IDs solo son únicos dentro de cada diario (La Jornada y Milenio usan números)
+            if article_id is not None:
+                is_new = self._conn.execute(
+                    "SELECT 1 FROM articles WHERE site = ? AND article_id = ? AND url != ?", (site, article_id, key)
+                ).fetchone() is None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles (url, site, article_id, processed_at) VALUES (?, ?, ?, ?)",
+                (key, site, article_id, datetime.now().isoformat(timespec="seconds"))
+            )
+        return is_new
+
+    def is_seen(self, url):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM articles WHERE url = ?", (self.normalize_url(url),)
+            ).fetchone() is not None
+
+    def processed(self):
+        """[(url, site)] of every processed URL, in processing order."""
+        with self._lock:
+            return self._conn.execute("SELECT url, site FROM articles ORDER BY processed_at, url").fetchall()
+
+    def terms_for(self, site, article_id):
+        """Terms whose searches returned the article of site with this ID."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT t.term FROM articles a JOIN article_terms t ON t.url = a.url "
+                "WHERE a.site = ? AND a.article_id = ? ORDER BY t.term", (site, article_id)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Vocabulary:
+    """Append-only word <-> id table used to store token counts as compact [id, count] pairs."""
+
+    def __init__(self, path="V1.0_vocabulary.txt"):
+        self.path = path
+        self.words = []
+        self.ids = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    word = line.rstrip("\n")
+                    if word and word not in self.ids:
+                        self.ids[word] = len(self.words)
+                        self.words.append(word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def encode(self, counts):
+        """Turn a word -> count mapping into [[id, count], ...] sorted by id."""
+        new_words = []
+        with self._lock:
+            pairs = []
+            for word, count in counts.items():
+                word_id = self.ids.get(word)
+                if word_id is None:
+                    word_id = len(self.words)
+                    self.ids[word] = word_id
+                    self.words.append(word)
+                    new_words.append(word)
+                pairs.append([word_id, count])
+            if new_words:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write("".join(word + "\n" for word in new_words))
+        pairs.sort()
+        return pairs
+
+    def decode(self, pairs):
+        return Counter({self.words[word_id]: count for word_id, count in pairs})
+
+
+class CrawlCheckpoint:
+    """Resumable crawl state per (site, term): results pages read and article URLs extracted."""
+
+    def __init__(self, path="V1.0_checkpoint.sqlite3"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "site TEXT NOT NULL, term TEXT NOT NULL, page INTEGER NOT NULL, links TEXT NOT NULL, "
+                "PRIMARY KEY (site, term, page))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS terms ("
+                "site TEXT NOT NULL, term TEXT NOT NULL, discovery_done INTEGER NOT NULL DEFAULT 0, "
+                "done INTEGER NOT NULL DEFAULT 0, updated_at TEXT, window_start TEXT, window_end TEXT, "
+                "page_count INTEGER, PRIMARY KEY (site, term))"
+            )
+            # Rango de fechas con que se terminó el término y páginas de resultados de la búsqueda;
+            # los checkpoints anteriores no los tenían
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(terms)")}
+            for column, kind in (("window_start", "TEXT"), ("window_end", "TEXT"), ("page_count", "INTEGER")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE terms ADD COLUMN {column} {kind}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extracted ("
+                "site TEXT NOT NULL, term TEXT NOT NULL, url TEXT NOT NULL, PRIMARY KEY (site, term, url))"
+            )
+
+    def _set_term(self, site, term, column):
+        self._conn.execute(
+            "INSERT OR IGNORE INTO terms (site, term) VALUES (?, ?)", (site, term)
+        )
+        self._conn.execute(
+            f"UPDATE terms SET {column} = 1, updated_at = ? WHERE site = ? AND term = ?",
+            (datetime.now().isoformat(timespec="seconds"), site, term)
+        )
+
+    def _term_flag(self, site, term, column):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {column} FROM terms WHERE site = ? AND term = ?", (site, term)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def save_page(self, site, term, page_number, links, is_last=False, page_count=None):
+        """Callback for get_article_links; page_number None only marks the end of the results."""
+        with self._lock, self._conn:
+            if page_number is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages (site, term, page, links) VALUES (?, ?, ?, ?)",
+                    (site, term, page_number, json.dumps(links, ensure_ascii=False))
+                )
+            if page_count is not None:
+                self._conn.execute("INSERT OR IGNORE INTO terms (site, term) VALUES (?, ?)", (site, term))
+                self._conn.execute(
+                    "UPDATE terms SET page_count = ? WHERE site = ? AND term = ?", (page_count, site, term)
+                )
+            if is_last:
+                self._set_term(site, term, "discovery_done")
+
+    def pages(self, site, term):
+        """Links of each results page already read, as {page: links}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, links FROM pages WHERE site = ? AND term = ? ORDER BY page", (site, term)
+            ).fetchall()
+        return {page: json.loads(links) for page, links in rows}
+
+    def missing_pages(self, site, term):
+        """Results pages 1..page_count not saved yet, or None while page_count is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_count FROM terms WHERE site = ? AND term = ?", (site, term)
+            ).fetchone()
+            if not row or row[0] is None:
+                return None
+            saved = {page for page, in self._conn.execute(
+                "SELECT page FROM pages WHERE site = ? AND term = ?", (site, term)
+            )}
+        return [page for page in range(1, row[0] + 1) if page not in saved]
+
+    def discovery_done(self, site, term):
+        return self._term_flag(site, term, "discovery_done")
+
+    def mark_extracted(self, site, term, url):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO extracted (site, term, url) VALUES (?, ?, ?)", (site, term, url)
+            )
+
+    def extracted(self, site, term):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM extracted WHERE site = ? AND term = ?", (site, term)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def finish_term(self, site, term, date_window=None):
+        """Mark (site, term) as done for date_window (None: any date)."""
+        start = date_window.start.isoformat() if date_window and date_window.start else None
+        end = date_window.end.isoformat() if date_window and date_window.end else None
+        with self._lock, self._conn:
+            self._set_term(site, term, "done")
+            self._conn.execute(
+                "UPDATE terms SET window_start = ?, window_end = ? WHERE site = ? AND term = ?",
+                (start, end, site, term)
+            )
+
+    def is_done(self, site, term, date_window=None):
+        """Whether (site, term) was finished with a date window that covers date_window."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT done, window_start, window_end FROM terms WHERE site = ? AND term = ?", (site, term)
+            ).fetchone()
+        if not (row and row[0]):
+            return False
+        if date_window is None:
+            return True
+        # NULL es un extremo abierto; las fechas ISO se comparan como texto
+        done_start, done_end = row[1], row[2]
+        start = date_window.start.isoformat() if date_window.start else None
+        end = date_window.end.isoformat() if date_window.end else None
+        return ((done_start is None or (start is not None and start >= done_start))
+                and (done_end is None or (end is not None and end <= done_end)))
+
+    def age(self, site, term):
+        """Seconds since (site, term) was last marked, or None if it never was."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM terms WHERE site = ? AND term = ?", (site, term)
+            ).fetchone()
+        if not (row and row[0]):
+            return None
+        return (datetime.now() - datetime.fromisoformat(row[0])).total_seconds()
+
+    def reset(self, site, term):
+        """Forget the progress of (site, term) so that it is crawled again."""
+        with self._lock, self._conn:
+            for table in ("pages", "terms", "extracted"):
+                self._conn.execute(f"DELETE FROM {table} WHERE site = ? AND term = ?", (site, term))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class InvertedIndex:
+    """On-disk SQLite inverted index of the stored articles, updated as they are written.
+
+    Maps each token to the articles that contain it and how many times (postings), with
+    secondary indexes on fecha, diario and ubicación_noticia for aggregate queries.
+    """
+
+    # Agrupaciones de count(); fecha se guarda como AAAA-MM-DD
+    GROUPS = {
+        "day": "a.fecha",
+        "month": "substr(a.fecha, 1, 7)",
+        "year": "substr(a.fecha, 1, 4)",
+        "diario": "a.diario",
+        "ubicación": "a.ubicacion",
+        "país": "a.pais",
+    }
+
+    def __init__(self, path="V1.0_index.sqlite3"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Se puede reconstruir desde el almacén con rebuild(), así que no hace falta un fsync por lote
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            # Los índices de versiones anteriores tenían article_id único entre todos los diarios
+            schema = self._conn.execute("SELECT sql FROM sqlite_master WHERE name = 'articles'").fetchone()
+            if schema and "article_id TEXT UNIQUE" in schema[0]:
+                print(f"{path} uses an old schema; it was emptied, rebuild it with --reindex")
+                for table in ("postings", "terms", "articles"):
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            # Un ID se repite solo dentro del mismo diario; las notas sin ID (NULL) nunca chocan
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "doc INTEGER PRIMARY KEY, article_id TEXT, fecha TEXT, diario TEXT, pais TEXT, ubicacion TEXT, "
+                "UNIQUE (diario, article_id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_fecha ON articles (fecha)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_diario ON articles (diario, fecha)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS articles_ubicacion ON articles (ubicacion, fecha)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS terms (term_id INTEGER PRIMARY KEY, term TEXT UNIQUE)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "term_id INTEGER NOT NULL, doc INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "PRIMARY KEY (term_id, doc)) WITHOUT ROWID"
+            )
+        self._term_ids = dict(self._conn.execute("SELECT term, term_id FROM terms"))
+
+    @staticmethod
+    def iso_date(fecha):
+        day = parse_fecha(fecha) if isinstance(fecha, str) else None
+        return day.isoformat() if day else None
+
+    def _term_id(self, term):
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._conn.execute("INSERT INTO terms (term) VALUES (?)", (term,)).lastrowid
+            self._term_ids[term] = term_id
+        return term_id
+
+    def add_many(self, articles):
+        """Index articles whose token is a {word: count} mapping; IDs already indexed for the diario are skipped."""
+        with self._lock:
+            try:
+                return self._add_many(articles)
+            except Exception:
+                # Los términos nuevos de la transacción fallida no llegaron a la base
+                self._term_ids = dict(self._conn.execute("SELECT term, term_id FROM terms"))
+                raise
+
+    def _add_many(self, articles):
+        added = 0
+        postings = []
+        with self._conn:
+            for article in articles:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO articles (article_id, fecha, diario, pais, ubicacion) VALUES (?, ?, ?, ?, ?)",
+                    (article.get("ID_noticia"), self.iso_date(article.get("fecha")), article.get("diario"),
+                     article.get("país"), article.get("ubicación_noticia"))
+                )
+                if not cursor.rowcount:
+                    continue
+                doc = cursor.lastrowid
+                added += 1
+                postings.extend((self._term_id(word), doc, count) for word, count in article.get("token", {}).items())
+                # Las frases de TermMatcher se indexan como un término más, con espacios
+                postings.extend(
+                    (self._term_id(phrase), doc, count) for phrase, count in article.get("términos", {}).items()
+                    if " " in phrase
+                )
+            # En orden de término las inserciones recorren la tabla de postings una sola vez
+            postings.sort()
+            self._conn.executemany("INSERT INTO postings (term_id, doc, count) VALUES (?, ?, ?)", postings)
+        return added
+
+    def add(self, article):
+        return self.add_many([article]) == 1
+
+    def rebuild(self, articles, vocabulary=None, batch_size=500):
+        """Index an existing store; token ids are decoded with vocabulary."""
+        batch = []
+        added = 0
+        for article in articles:
+            if isinstance(article.get("token"), list):
+                article = dict(article, token=vocabulary.decode(article["token"]))
+            batch.append(article)
+            if len(batch) >= batch_size:
+                added += self.add_many(batch)
+                batch = []
+        return added + self.add_many(batch)
+
+    def _where(self, term, diario, ubicacion, pais, start, end):
+        """Join and filters selecting the articles with term as an indexed phrase, else with all its words."""
+        words = BaseScraper.tokenize(term)
+        phrase = " ".join(words)
+        if len(words) > 1 and phrase in self._term_ids:
+            # Frase contada por TermMatcher: coincidencia exacta en lugar de todas las palabras
+            term_ids = [self._term_ids[phrase]]
+        else:
+            words = [word for word in words if word not in BaseScraper.get_stop_words()]
+            term_ids = [self._term_ids.get(word) for word in words]
+        if not words or None in term_ids:
+            return None
+        # Artículos con todas las palabras del término; cnt es la suma de sus apariciones
+        sql = (
+            "FROM (SELECT doc, SUM(count) AS cnt FROM postings WHERE term_id IN ({}) "
+            "GROUP BY doc HAVING COUNT(*) = ?) p JOIN articles a ON a.doc = p.doc WHERE 1 = 1"
+        ).format(",".join("?" * len(term_ids)))
+        params = term_ids + [len(term_ids)]
+        for column, value in (("diario", diario), ("ubicacion", ubicacion), ("pais", pais)):
+            if value is not None:
+                sql += f" AND a.{column} = ?"
+                params.append(value)
+        if start is not None:
+            sql += " AND a.fecha >= ?"
+            params.append(self.iso_date(start) or start)
+        if end is not None:
+            sql += " AND a.fecha <= ?"
+            params.append(self.iso_date(end) or end)
+        return sql, params
+
+    def count(self, term, diario=None, ubicacion=None, pais=None, start=None, end=None, group_by=None):
+        """Number of articles that mention term, optionally filtered and grouped.
+
+        start and end accept dd/mm/AAAA or AAAA-MM-DD; group_by is one of GROUPS and
+        returns {group: articles}, e.g. count("feminicidio", diario="La Jornada",
+        ubicacion="Jalisco", group_by="month").
+        """
+        query = self._where(term, diario, ubicacion, pais, start, end)
+        if group_by is None:
+            if query is None:
+                return 0
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) " + query[0], query[1]).fetchone()[0]
+        if query is None:
+            return {}
+        group = self.GROUPS[group_by]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {group}, COUNT(*) {query[0]} GROUP BY 1 ORDER BY 1", query[1]
+            ).fetchall()
+        return dict(rows)
+
+    def articles(self, term, diario=None, ubicacion=None, pais=None, start=None, end=None):
+        """[(ID_noticia, fecha, occurrences)] of the articles that mention term, most mentions first."""
+        query = self._where(term, diario, ubicacion, pais, start, end)
+        if query is None:
+            return []
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT a.article_id, a.fecha, p.cnt {query[0]} ORDER BY p.cnt DESC, a.fecha", query[1]
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class WaybackCDX:
+    """Archived article URLs from the Wayback Machine CDX server, for backfills without site search.
+
+    A query lists the captures of a domain made since a date, filtered by status 200, text/html
+    and an article URL pattern, one capture per URL (collapse=urlkey). The results come in pages
+    chained by resumeKey; each page is cached as JSON under cache_dir, so repeating or resuming
+    a backfill reads the pages it already has instead of querying the server again. Cached pages
+    expire after cache_ttl seconds, and the last page, where new captures appear, is always asked
+    again unless cache_ttl is None.
+    endpoint and archive_url can point to a local stand-in of the CDX server and the archive.
+    """
+
+    ENDPOINT = "https://web.archive.org/cdx/search/cdx"
+    ARCHIVE_URL = "https://web.archive.org/web"
+    # Las capturas viejas suelen guardar la URL con el puerto, como http://www.milenio.com:80/...
+    DEFAULT_PORT_RE = re.compile(r"^(https?://[^/:]+):(?:80|443)(?=/|$)")
+    # URL original dentro de la de una copia de snapshot_url()
+    SNAPSHOT_RE = re.compile(r"/\d{14}id_/(https?://.+)$")
+
+    def __init__(self, endpoint=ENDPOINT, archive_url=ARCHIVE_URL, cache_dir="V1.0_cdx_cache",
+                 page_size=5000, http_client=None, cache_ttl=7 * 24 * 3600):
+        self.endpoint = endpoint
+        self.archive_url = archive_url.rstrip("/")
+        # Con cache_dir=None cada página se vuelve a pedir
+        self.cache_dir = cache_dir
+        # cache_ttl=None: las páginas guardadas no caducan, ni siquiera la última
+        self.cache_ttl = cache_ttl
+        self.page_size = page_size
+        self._http_client = http_client
+
+    @property
+    def http_client(self):
+        if self._http_client is None:
+            self._http_client = HttpClient()
+        return self._http_client
+
+    @staticmethod
+    def query(domain, start=None, url_pattern=None):
+        """CDX parameters for the captures of domain and its subdomains made since start."""
+        params = [
+            ("url", domain), ("matchType", "domain"), ("output", "json"), ("fl", "timestamp,original"),
+            ("filter", "statuscode:200"), ("filter", "mimetype:text/html"), ("collapse", "urlkey"),
+        ]
+        # Son fechas de captura: una nota se archiva el día que se publica o después, así que no hay
+        # límite final; la fecha de publicación de cada nota se revisa al parsearla
+        if start is not None:
+            params.append(("from", start.strftime("%Y%m%d")))
+        if url_pattern:
+            params.append(("filter", "original:" + url_pattern))
+        return params
+
+    @classmethod
+    def parse(cls, text):
+        """([(timestamp, original URL)], resume key or None) of a CDX response with output=json."""
+        data = json.loads(text) if text.strip() else []
+        # La clave para pedir la página siguiente va al final, después de una fila vacía
+        resume_key = None
+        if len(data) >= 2 and data[-2] == []:
+            resume_key = data[-1][0]
+            data = data[:-2]
+        if not data:
+            return [], resume_key
+        # La primera fila trae los nombres de los campos
+        timestamp, original = data[0].index("timestamp"), data[0].index("original")
+        rows = [(row[timestamp], cls.DEFAULT_PORT_RE.sub(r"\1", row[original])) for row in data[1:]]
+        return rows, resume_key
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _cached_page(self, path):
+        try:
+            age = time.time() - os.path.getmtime(path)
+            with open(path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.cache_ttl is not None and (age > self.cache_ttl or cached["resume_key"] is None):
+            return None
+        return [tuple(row) for row in cached["rows"]], cached["resume_key"]
+
+    def page(self, params, resume_key=None):
+        """One page of captures of a query() and the resume key of the next one (None on the last).
+
+        Raises FetchError for error responses, like the article downloads.
+        """
+        page_params = params + [("limit", str(self.page_size)), ("showResumeKey", "true")]
+        if resume_key:
+            page_params.append(("resumeKey", resume_key))
+        url = f"{self.endpoint}?{urlencode(page_params)}"
+        path = self._cache_path(url) if self.cache_dir else None
+        cached = self._cached_page(path) if path else None
+        if cached is not None:
+            return cached
+
+        response = self.http_client.get(url)
+        if response.status_code >= 400:
+            raise FetchError(url, response.status_code,
+                             FetchError.parse_retry_after(response.headers.get("Retry-After")))
+        rows, next_key = self.parse(response.text)
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Se escribe aparte y se renombra para que una interrupción no deje la página a medias
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"url": url, "rows": rows, "resume_key": next_key}, f)
+            os.replace(path + ".tmp", path)
+        return rows, next_key
+
+    def captures(self, params):
+        """Every capture of a query(), page after page."""
+        resume_key = None
+        while True:
+            rows, resume_key = self.page(params, resume_key)
+            yield from rows
+            if not resume_key:
+                return
+
+    def snapshot_url(self, timestamp, original):
+        # Con id_ el archivo devuelve la página tal como se capturó, sin su barra ni los enlaces reescritos
+        return f"{self.archive_url}/{timestamp}id_/{original}"
+
+
+# Columnas de los artículos que se exportan a Parquet, en el orden de las filas de la matriz
+EXPORT_COLUMNS = ["ID_noticia", "fecha", "diario", "país", "ubicación_noticia"]
+
+def export_corpus(articles, prefix="V1.0_corpus", vocabulary=None):
+    """Write the stored articles as columnar metadata plus a sparse term-document matrix.
+
+    - <prefix>_metadata.parquet: EXPORT_COLUMNS, one row per article.
+    - <prefix>_tokens.npz: CSR matrix (data, indices, indptr, shape) with the word counts;
+      row i is the article in row i of the Parquet file. scipy.sparse.load_npz reads it.
+    - <prefix>_vocabulary.txt: one word per line; line j is column j of the matrix.
+
+    Token counts may be {word: count} or [id, count] pairs of vocabulary, whose ids are kept.
+    Returns the matrix shape.
+    """
+    import numpy as np
+    import pandas as pd
+
+    words = list(vocabulary.words) if vocabulary is not None else []
+    ids = {word: word_id for word_id, word in enumerate(words)}
+    columns = {column: [] for column in EXPORT_COLUMNS}
+    # Los arreglos crecen sin crear un objeto de Python por conteo
+    indptr = array("q", [0])
+    indices = array("i")
+    data = array("i")
+    for article in articles:
+        tokens = article.get("token") or {}
+        if isinstance(tokens, list):
+            if vocabulary is None:
+                raise ValueError("Token ids need the vocabulary they were encoded with")
+            pairs = tokens
+        else:
+            pairs = []
+            for word, count in tokens.items():
+                word_id = ids.get(word)
+                if word_id is None:
+                    word_id = ids[word] = len(words)
+                    words.append(word)
+                pairs.append((word_id, count))
+            pairs.sort()
+        for word_id, count in pairs:
+            indices.append(word_id)
+            data.append(count)
+        indptr.append(len(indices))
+        for column in EXPORT_COLUMNS:
+            columns[column].append(article.get(column))
+
+    shape = (len(indptr) - 1, len(words))
+    metadata = pd.DataFrame(columns)
+    metadata["fecha"] = pd.to_datetime(metadata["fecha"], format="%d/%m/%Y", errors="coerce")
+    for column in ("diario", "país", "ubicación_noticia"):
+        metadata[column] = metadata[column].astype("category")
+    metadata.to_parquet(f"{prefix}_metadata.parquet", index=False)
+
+    np.savez_compressed(
+        f"{prefix}_tokens.npz",
+        data=np.frombuffer(data, dtype=np.intc),
+        indices=np.frombuffer(indices, dtype=np.intc),
+        indptr=np.frombuffer(indptr, dtype=np.int64),
+        shape=np.array(shape),
+        format=np.array("csr"),
+    )
+    with open(f"{prefix}_vocabulary.txt", "w", encoding="utf-8") as file:
+        file.write("".join(word + "\n" for word in words))
+    print(f"Exported {shape[0]} articles x {shape[1]} words to {prefix}_*")
+    return shape
+
+def load_corpus(prefix="V1.0_corpus"):
+    """Read an export_corpus output back as (metadata DataFrame, matrix, words).
+
+    The matrix is a scipy.sparse.csr_matrix when scipy is installed, else the dict of CSR arrays.
+    """
+    import numpy as np
+    import pandas as pd
+
+    metadata = pd.read_parquet(f"{prefix}_metadata.parquet")
+    with np.load(f"{prefix}_tokens.npz") as arrays:
+        matrix = {name: arrays[name] for name in ("data", "indices", "indptr", "shape")}
+    if importlib.util.find_spec("scipy"):
+        from scipy.sparse import csr_matrix
+        matrix = csr_matrix((matrix["data"], matrix["indices"], matrix["indptr"]), shape=tuple(matrix["shape"]))
+    with open(f"{prefix}_vocabulary.txt", "r", encoding="utf-8") as file:
+        words = [line.rstrip("\n") for line in file]
+    return metadata, matrix, words
+
+
+SITES = {
+    'el_universal': (ElUniversalScraper, 'https://www.eluniversal.com.mx'),
+    'la_jornada': (LaJornadaScraper, 'https://www.jornada.com.mx'),
+    'milenio': (MilenioScraper, 'https://www.milenio.com')
+}
+
+
+def benchmark_parsers(directory, repeat=5):
+    """Time parse_article on saved article pages named <site>*.html with every parser backend.
+
+    Compares the full html.parser tree (the original behaviour) against targeted parsing
+    with each available backend, and checks that all of them extract the same data.
+    """
+    variants = [("html.parser", False)] + [(backend, True) for backend in PARSER_BACKENDS]
+    results = {}
+    for site, (scraper_class, base_url) in SITES.items():
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.startswith(site) and name.endswith(".html")
+        )
+        if not paths:
+            continue
+        pages = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as file:
+                pages.append((path, file.read()))
+
+        baseline_ms = None
+        expected = None
+        results[site] = {}
+        print(f"\n{site} ({len(pages)} pages)")
+        for backend, targeted in variants:
+            scraper = scraper_class(base_url, parser_backend=backend, targeted_parsing=targeted)
+            timings = []
+            parsed = []
+            for _ in range(repeat):
+                parsed = []
+                start = time.perf_counter()
+                for path, html in pages:
+                    parsed.append(scraper.parse_article(path, html))
+                timings.append((time.perf_counter() - start) * 1000 / len(pages))
+            ms = statistics.median(timings)
+            if baseline_ms is None:
+                baseline_ms, expected = ms, parsed
+            name = f"{backend}{' (targeted)' if targeted else ''}"
+            same = "ok" if parsed == expected else "DIFFERENT OUTPUT"
+            results[site][name] = ms
+            print(f"  {name:<26} {ms:8.2f} ms/page  x{baseline_ms / ms:5.1f}  {same}")
+    return results
+
+# Etapas de extract_article_data que mide benchmark_extraction
+EXTRACTION_STAGES = [
+    "fetch", "parse", "get_page_keys", "extract_location_with_nlp", "tokenize", "word_count", "normalizar_fecha"
+]
+
+class StageTimer:
+    """Wraps the functions behind each extraction stage of a scraper and accumulates their time.
+
+    "parse" is parse_article without the get_page_keys and normalizar_fecha calls it makes.
+    The originals are restored on exit.
+    """
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.totals = dict.fromkeys(EXTRACTION_STAGES, 0.0)
+        self._patched = []
+
+    def _timed(self, stage, function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - start
+        return wrapper
+
+    def _patch(self, owner, name, stage, static=False):
+        original = owner.__dict__[name] if name in owner.__dict__ else None
+        function = getattr(owner, name)
+        wrapper = self._timed(stage, function)
+        setattr(owner, name, staticmethod(wrapper) if static else wrapper)
+        self._patched.append((owner, name, original))
+
+    def __enter__(self):
+        scraper_class = type(self.scraper)
+        self._patch(self.scraper, "fetch", "fetch")
+        self._patch(self.scraper, "parse_article", "parse")
+        # get_page_keys se llama como función de la clase, no como método
+        self._patch(scraper_class, "get_page_keys", "get_page_keys")
+        # build_article separa el texto con tokenize antes de word_count y le pasa las palabras
+        for name in ("extract_location_with_nlp", "tokenize", "word_count", "normalizar_fecha"):
+            self._patch(BaseScraper, name, name, static=True)
+        return self
+
+    def __exit__(self, *exc_info):
+        for owner, name, original in reversed(self._patched):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._patched = []
+        self.totals["parse"] -= self.totals["get_page_keys"] + self.totals["normalizar_fecha"]
+        return False
+
+
+class FixtureServer:
+    """Local HTTP stand-in that serves a fixtures directory on 127.0.0.1."""
+
+    def __init__(self, directory):
+        handler = functools.partial(_QuietHandler, directory=directory)
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    # Conexiones keep-alive, como las de los sitios reales
+    protocol_version = "HTTP/1.1"
+    # Sin charset requests decodifica el cuerpo como ISO-8859-1 y los acentos llegan rotos
+    extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map, ".html": "text/html; charset=utf-8"}
+    # Sin Nagle las cabeceras y el cuerpo no esperan el ACK retardado del cliente
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def benchmark_extraction(directory=FIXTURES_DIR, repeat=3, parser_backend=None):
+    """Time extract_article_data on article pages served by a local HTTP server.
+
+    Pages are <site>_<n>.html files in directory (by default the synthetic fixtures). Reports
+    milliseconds per article for each stage in EXTRACTION_STAGES and articles per second for
+    each site, without touching the network. The rate is only given when no extraction failed.
+    """
+    results = {}
+    with FixtureServer(directory) as server:
+        for site, (scraper_class, base_url) in SITES.items():
+            names = sorted(name for name in os.listdir(directory) if name.startswith(site) and name.endswith(".html"))
+            if not names:
+                continue
+            urls = [f"{server.base_url}/{name}" for name in names]
+            scraper = scraper_class(server.base_url, parser_backend=parser_backend)
+            # Primera pasada sin medir: conexiones, cachés y expresiones regulares ya listas
+            for url in urls:
+                try:
+                    scraper.extract_article_data(url)
+                except Exception:
+                    pass
+
+            errors = 0
+            with StageTimer(scraper) as timer:
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    for url in urls:
+                        try:
+                            scraper.extract_article_data(url)
+                        except Exception as e:
+                            errors += 1
+                            print(f"  {url}: {type(e).__name__}: {e}")
+                elapsed = time.perf_counter() - start
+
+            count = repeat * len(urls)
+            stages = {stage: timer.totals[stage] * 1000 / count for stage in EXTRACTION_STAGES}
+            # Una extracción que falla a medias no es un artículo: con errores no hay tasa que reportar
+            rate = count / elapsed if not errors else None
+            results[site] = {
+                "articles": count - errors,
+                "errors": errors,
+                "articles_per_second": rate,
+                "ms_per_article": stages,
+            }
+            print(f"\n{site} ({len(urls)} pages x {repeat}, {errors} errors)")
+            for stage, ms in stages.items():
+                print(f"  {stage:<26} {ms:8.2f} ms/article")
+            if rate is None:
+                print(f"  {'total':<26} no rate: {errors} of {count} extractions failed")
+            else:
+                print(f"  {'total':<26} {elapsed * 1000 / count:8.2f} ms/article  {rate:7.1f} articles/s")
+    return results
+
+
 class WebScraper:
     """Main class to manage scraping across different news sites."""
     
-    def __init__(self, output_file="V1.0_articles.json"):
+    def __init__(self, output_file="V1.0_articles.jsonl", max_workers=None, domain_limits=None, browser_pool=None,
+                 seen_file="V1.0_seen.sqlite3", ner_batch_size=32, ner_processes=1,
+                 token_format="counter", vocabulary_file="V1.0_vocabulary.txt",
+                 cache_dir="V1.0_http_cache", cache_ttl=30 * 24 * 3600, cache_max_bytes=2 * 1024 ** 3,
+                 checkpoint_file="V1.0_checkpoint.sqlite3", parser_backend=None,
+                 cpu_workers=2, queue_size=64, max_concurrent_jobs=6, max_jobs_per_site=2,
+                 metrics_file="V1.0_metrics", max_retries=4, max_domain_limit=MAX_DOMAIN_LIMIT, http2=False,
+                 index_file="V1.0_index.sqlite3", match_terms=None, date_window=None,
+                 wayback_endpoint=WaybackCDX.ENDPOINT, wayback_archive=WaybackCDX.ARCHIVE_URL,
+                 cdx_cache_dir="V1.0_cdx_cache", cdx_cache_ttl=7 * 24 * 3600, recrawl_after=24 * 3600):
+        # Un solo navegador compartido por todos los scrapers durante la ejecución
+        self.browser_pool = browser_pool or BrowserPool()
+        # Contadores y latencias de toda la ejecución; al cerrar se escriben <metrics_file>.json y .prom
+        self.metrics = Metrics()
+        self.metrics_file = metrics_file
+        # Conexiones keep-alive compartidas por todos los scrapers
+        self.http_client = HttpClient(max(HTTP_POOL_SIZE, max_domain_limit), http2)
+        # Con cache_dir=None cada artículo se vuelve a descargar
+        self.response_cache = ResponseCache(cache_dir, cache_ttl, cache_max_bytes) if cache_dir else None
         self.scrapers = {
-            'el_universal': ElUniversalScraper('https://www.eluniversal.com.mx'),
-            'la_jornada': LaJornadaScraper('https://www.jornada.com.mx'),
-            'milenio': MilenioScraper('https://www.milenio.com')
+            site: scraper_class(
+                base_url, self.browser_pool, self.response_cache, parser_backend,
+                metrics=self.metrics, http_client=self.http_client, date_window=date_window
+            )
+            for site, (scraper_class, base_url) in SITES.items()
         }
         self.output_file = output_file
+        self.store = ArticleStore(output_file)
+        self.seen = SeenIndex(seen_file)
+        self.checkpoint = CrawlCheckpoint(checkpoint_file)
+        # Segundos tras los que un término terminado se vuelve a buscar, porque los sitios publican
+        # notas nuevas; None no lo vuelve a buscar nunca
+        self.recrawl_after = recrawl_after
+        # Fechas de publicación que se conservan; por defecto desde 2016
+        self.date_window = date_window or DEFAULT_DATE_WINDOW
+        # Frases que se cuentan en cada artículo (campo "términos"), normalmente las de Términos.csv
+        self.match_terms = tuple(match_terms) if match_terms else None
+        # Índice invertido que se actualiza con cada artículo guardado; None lo desactiva
+        self.index = InvertedIndex(index_file) if index_file else None
+        # Consultas al CDX del Wayback Machine para backfill(), con las páginas guardadas en cdx_cache_dir
+        self.wayback = WaybackCDX(wayback_endpoint, wayback_archive, cdx_cache_dir,
+                                  http_client=self.http_client, cache_ttl=cdx_cache_ttl)
+        # Límites iniciales por dominio; cada uno se ajusta durante la ejecución hasta max_domain_limit
+        self.domain_limits = dict(DOMAIN_LIMITS)
+        if domain_limits:
+            self.domain_limits.update(domain_limits)
+        self.max_domain_limit = max_domain_limit
+        # Un hilo de descarga por cada lugar que pueden llegar a tener los dominios a la vez, para que
+        # el limitador reaccione a la latencia de los sitios y no a la cola del executor
+        self.max_workers = max_workers or sum(max(limit, max_domain_limit) for limit in self.domain_limits.values())
+        self.max_retries = max_retries
+        self.ner_batch_size = ner_batch_size
+        self.ner_processes = ner_processes
+        # "counter" guarda {palabra: conteo}; "ids" guarda pares [id, conteo] del vocabulario
+        self.token_format = token_format
+        self.vocabulary = Vocabulary(vocabulary_file) if token_format == "ids" else None
+        self.parser_backend = parser_backend or DEFAULT_PARSER_BACKEND
+        # Procesos para parseo, NER y conteo de palabras; con 0 se usan hilos del executor
+        self.cpu_workers = cpu_workers
+        # Tamaño máximo de las colas entre etapas, para acotar la memoria
+        self.queue_size = queue_size
+        # Búsquedas (sitio, término) simultáneas en total y por sitio dentro de scrape_all
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_jobs_per_site = max_jobs_per_site
+        self._executor = None
+        self._process_executor = None
+        self._store_executor = None
+        self._rate_limiters = {}
+        # Links descartados en esta ejecución por su fecha de publicación, que no quedan en el índice
+        self._date_rejected = set()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    @property
+    def store_executor(self):
+        # Un solo hilo para el almacén y los índices: las escrituras no esperan detrás de las descargas
+        if self._store_executor is None:
+            self._store_executor = ThreadPoolExecutor(max_workers=1)
+        return self._store_executor
+
+    @property
+    def process_executor(self):
+        if self.cpu_workers <= 0:
+            return self.executor
+        if self._process_executor is None:
+            self._process_executor = ProcessPoolExecutor(max_workers=self.cpu_workers)
+        return self._process_executor
+
+    def export_corpus(self, prefix="V1.0_corpus"):
+        """Export the articles stored so far with export_corpus."""
+        return export_corpus(self.store, prefix, self.vocabulary)
+
+    def write_metrics(self):
+        """Write the run's metrics as <metrics_file>.json and <metrics_file>.prom."""
+        if not self.metrics_file:
+            return
+        self.metrics.write_json(self.metrics_file + ".json")
+        self.metrics.write_prometheus(self.metrics_file + ".prom")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._process_executor is not None:
+            self._process_executor.shutdown(wait=True)
+            self._process_executor = None
+        if self._store_executor is not None:
+            self._store_executor.shutdown(wait=True)
+            self._store_executor = None
+        self._rate_limiters = {}
+        self.store.close()
+        self.seen.close()
+        self.checkpoint.close()
+        if self.index is not None:
+            self.index.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+        self.http_client.close()
+        self.write_metrics()
+
+    async def aclose(self):
+        await self.browser_pool.close()
+        self.close()
+
+    @staticmethod
+    def domain_of(url):
+        host = (urlparse(url).hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return host
+
+    def rate_limiter(self, url):
+        """Rate limiter shared by every crawl of the run that paces the requests to url's domain."""
+        domain = self.domain_of(url)
+        if domain not in self._rate_limiters:
+            self._rate_limiters[domain] = AdaptiveRateLimiter(
+                self.domain_limits.get(domain, DEFAULT_DOMAIN_LIMIT),
+                maximum=self.max_domain_limit, max_retries=self.max_retries
+            )
+        return self._rate_limiters[domain]
+
+    def _store_results(self, site, results, term=None):
+        stored = []
+        indexed = []
+        for link, article, error in results:
+            if error is not None:
+                print(f"Error processing article {link}: {error}")
+                self.seen.release(link)
+                continue
+            if article is None:
+                # Fuera del rango de fechas: se libera sin marcarla, así que un rango más amplio la recupera
+                self.metrics.inc(site, "articles_discarded")
+                self.seen.release(link)
+                self._date_rejected.add(link)
+                continue
+            article_id = article.get("ID_noticia")
+            if term is not None:
+                self.checkpoint.mark_extracted(site, term, link)
+            if not self.seen.mark_processed(link, site, article_id):
+                self.metrics.inc(site, "duplicates")
+                print(f"Duplicated article {article_id}: {link}")
+                continue
+            counts = article["token"]
+            if self.vocabulary is not None:
+                article["token"] = self.vocabulary.encode(counts)
+            self.store.append(article)
+            stored.append(article)
+            indexed.append(dict(article, token=counts))
+            self.metrics.inc(site, "articles_stored")
+        if self.index is not None and indexed:
+            self.index.add_many(indexed)
+        return stored
+
+    async def run_pipeline(self, site, scraper, link_queue, discovery=None, term=None, fetch_urls=None,
+                           limiter=None):
+        """Staged pipeline: link discovery -> concurrent fetch -> CPU workers -> storage writer.
+
+        link_queue receives the links to extract, usually from the discovery coroutine while it runs.
+        The stages are connected by queues of at most queue_size items (link_queue included when the
+        caller bounds it), so a slow stage holds back the previous one, link discovery too, and
+        memory stays bounded however many links a term returns.
+        A link found in fetch_urls is downloaded from that URL instead (e.g. an archived copy),
+        paced by limiter rather than by the site's own one.
+        """
+        loop = asyncio.get_running_loop()
+        limiter = limiter or self.rate_limiter(scraper.base_url)
+        # Hay tantos workers como el límite máximo; el limitador decide cuántos descargan a la vez
+        fetch_workers = limiter.maximum
+        process_workers = max(1, self.cpu_workers)
+        # Con procesos cada lote lleva n_process=1; solo con hilos se reparte nlp.pipe
+        ner_processes = self.ner_processes if self.cpu_workers <= 0 else 1
+        html_queue = asyncio.Queue(maxsize=self.queue_size)
+        result_queue = asyncio.Queue(maxsize=self.queue_size)
+        new_articles = []
+
+        async def fetch(url):
+            with self.metrics.time(site, "fetch"):
+                return await loop.run_in_executor(self.executor, scraper.fetch, url)
+
+        def on_retry(link, attempt, error, delay, throttled):
+            self.metrics.inc(site, "retries")
+            if throttled:
+                self.metrics.inc(site, "throttled")
+            print(f"Retrying {link} in {delay:.1f}s ({error}); {self.domain_of(link)} limit {limiter.limit:.1f}")
+
+        async def fetch_worker():
+            while True:
+                link = await link_queue.get()
+                if link is None:
+                    break
+                print(link)
+                url = fetch_urls.get(link, link) if fetch_urls else link
+                try:
+                    # Una copia fresca en el caché no ocupa lugar en el límite del dominio ni lo hace crecer
+                    html = await loop.run_in_executor(self.executor, scraper.cached, url)
+                    if html is not None:
+                        self.metrics.inc(site, "cache_hits")
+                    else:
+                        html = await limiter.run(fetch, url, on_retry=functools.partial(on_retry, link))
+                except Exception as e:
+                    self.metrics.error(site, "fetch", e)
+                    print(f"Error processing article {link}: {e}")
+                    self.seen.release(link)
+                    continue
+                self.metrics.inc(site, "articles_fetched")
+                await html_queue.put((link, html))
+
+        async def process_worker():
+            finished = False
+            while not finished:
+                item = await html_queue.get()
+                if item is None:
+                    break
+                # Se juntan las páginas que ya esperan en la cola para pasarlas juntas por nlp.pipe
+                batch = [item]
+                while len(batch) < self.ner_batch_size:
+                    try:
+                        item = html_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is None:
+                        finished = True
+                        break
+                    batch.append(item)
+                try:
+                    results, snapshot = await loop.run_in_executor(
+                        self.process_executor, process_articles,
+                        site, self.parser_backend, batch, self.ner_batch_size, ner_processes, self.match_terms,
+                        self.date_window
+                    )
+                    self.metrics.merge(snapshot)
+                except Exception as e:
+                    self.metrics.error(site, "process", e)
+                    results = [(link, None, str(e)) for link, _ in batch]
+                await result_queue.put(results)
+
+        async def writer():
+            while True:
+                results = await result_queue.get()
+                if results is None:
+                    break
+                try:
+                    with self.metrics.time(site, "store"):
+                        new_articles.extend(
+                            await loop.run_in_executor(self.store_executor, self._store_results, site, results, term)
+                        )
+                except Exception as e:
+                    self.metrics.error(site, "store", e)
+                    print(f"Error storing {len(results)} articles: {e}")
+
+        fetchers = [asyncio.ensure_future(fetch_worker()) for _ in range(fetch_workers)]
+        processors = [asyncio.ensure_future(process_worker()) for _ in range(process_workers)]
+        writer_task = asyncio.ensure_future(writer())
+
+        if discovery is not None:
+            try:
+                await discovery
+            except Exception as e:
+                print(f"Error during link discovery: {e}")
+        for _ in fetchers:
+            await link_queue.put(None)
+        await asyncio.gather(*fetchers)
+        for _ in processors:
+            await html_queue.put(None)
+        await asyncio.gather(*processors)
+        await result_queue.put(None)
+        await writer_task
+        return new_articles
+
+    async def extract_articles(self, site, scraper, links, term=None, fetch_urls=None):
+        """Run the extraction pipeline over a fixed list of links already claimed in the seen index."""
+        link_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def feed():
+            for link in links:
+                await link_queue.put(link)
+
+        return await self.run_pipeline(site, scraper, link_queue, feed(), term, fetch_urls)
     
     async def scrape(self, site, query):
         scraper = self.scrapers.get(site)
         if not scraper:
             raise ValueError(f"No scraper found for {site}")
         
-        links = await scraper.get_article_links(query)
-        new_articles = []
-        
-        for link in links: 
-            print(link)
-            try:
-                #articles.append(scraper.extract_article_data(link))
-                new_articles.append(scraper.extract_article_data(link))
-                #new_articles = [scraper.extract_article_data(links[0])] if links else []
+        if self.checkpoint.is_done(site, query, self.date_window):
+            age = self.checkpoint.age(site, query)
+            if self.recrawl_after is None or (age is not None and age < self.recrawl_after):
+                print(f"'{query}' ya se completó en {site} en una ejecución anterior")
+                return []
+            # Se busca desde la primera página; el índice de vistos evita volver a descargar lo ya guardado
+            print(f"'{query}' se completó en {site} hace {(age or 0) / 3600:.1f} h, se vuelve a buscar")
+            self.checkpoint.reset(site, query)
+
+        extracted = self.checkpoint.extracted(site, query)
+        # Acotada: si la descarga se atrasa, la lectura de resultados espera
+        link_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def enqueue(page_links):
+            # Solo se descargan los artículos que no se procesaron en otro término o ejecución
+            self.seen.add_terms(page_links, query)
+            # Los que tienen en la URL una fecha fuera del rango ni se descargan. Quedan sin marcar,
+            # así que un rango más amplio los recupera después
+            in_window = [link for link in page_links if self.date_window.may_contain_url(link)]
+            if len(in_window) < len(page_links):
+                self.metrics.inc(site, "links_out_of_date_window", len(page_links) - len(in_window))
+                print(f"Skipping {len(page_links) - len(in_window)} links outside {self.date_window}")
+            pending = self.seen.claim_new([link for link in in_window if link not in extracted])
+            if len(pending) < len(in_window):
+                print(f"Skipping {len(in_window) - len(pending)} already processed links")
+            for link in pending:
+                await link_queue.put(link)
+
+        # Links de las páginas leídas en ejecuciones anteriores
+        saved_pages = self.checkpoint.pages(site, query)
+
+        async def on_page(page_number, page_links, is_last, page_count=None):
+            self.checkpoint.save_page(site, query, page_number, page_links, is_last, page_count)
+            # Los artículos empiezan a descargarse mientras se leen las siguientes páginas
+            await enqueue(page_links)
+
+        async def discovery():
+            for page_links in saved_pages.values():
+                await enqueue(page_links)
+            if not self.checkpoint.discovery_done(site, query):
+                # Las páginas se leen en paralelo y pueden guardarse con huecos: se leen todas las que faltan
+                if saved_pages:
+                    missing = self.checkpoint.missing_pages(site, query)
+                    print(f"Resuming {site} '{query}', missing pages: {missing if missing is not None else 'unknown'}")
+                await scraper.get_article_links(query, set(saved_pages), on_page)
+
+        with self.metrics.time(site, "term"):
+            new_articles = await self.run_pipeline(site, scraper, link_queue, discovery(), query)
+        self.metrics.inc(site, "terms")
+
+        # Los links fuera del rango (por su URL o por su fecha) no se procesan, pero no impiden terminar:
+        # el término queda terminado solo para este rango y uno más amplio lo vuelve a recorrer
+        links = [
+            link for page_links in self.checkpoint.pages(site, query).values() for link in page_links
+            if self.date_window.may_contain_url(link) and link not in self._date_rejected
+        ]
+        if self.checkpoint.discovery_done(site, query) and all(self.seen.is_seen(link) for link in links):
+            self.checkpoint.finish_term(site, query, self.date_window)
+        return new_articles
+
+    async def scrape_all(self, sites, terms):
+        """Run every (site, term) search on one event loop, sharing the browser pool and executors.
+
+        At most max_concurrent_jobs searches run at once, and at most max_jobs_per_site against
+        the same site, so the article fetches of each job still go through the domain limits.
+        Returns {site: {term: [articles]}}.
+        """
+        global_slots = asyncio.Semaphore(self.max_concurrent_jobs)
+        site_slots = {site: asyncio.Semaphore(self.max_jobs_per_site) for site in sites}
+        all_results = {site: {term: [] for term in terms} for site in sites}
+
+        async def job(site, term):
+            # Primero el turno del sitio, para no ocupar un lugar global mientras se espera
+            async with site_slots[site], global_slots:
+                print(f"\nBuscando artículos sobre '{term}' en {site.replace('_', ' ').title()}")
+                try:
+                    results = await self.scrape(site, term)
+                except Exception as e:
+                    print(f"Error al procesar '{term}' en {site}: {str(e)}")
+                    return
+                if results is not None:
+                    all_results[site][term] = results
+                    print(f"Se encontraron {len(results)} artículos para '{term}' en {site}")
+                else:
+                    print(f"No se obtuvieron resultados para '{term}' en {site}")
 
-            except Exception as e:
-                print(f"Error processing article {link}: {e}")
-        
-        #with open(self.output_file, "w", encoding="utf-8") as file:
-        #    json.dump(articles, file, indent=4, ensure_ascii=False)
-        
-        existing_articles = []
-        if os.path.exists(self.output_file) and os.path.getsize(self.output_file) > 0:
-            try:
-                with open(self.output_file, "r", encoding="utf-8") as file:
-                    existing_articles = json.load(file)
-            except json.JSONDecodeError:
-                print(f"Error reading existing JSON file. Creating new file.")
+        await asyncio.gather(*(job(site, term) for site in sites for term in terms))
+        return all_results
 
-        
-        all_articles = existing_articles + new_articles
-        with open(self.output_file, "w", encoding="utf-8") as file:
-            json.dump(all_articles, file, indent=4, ensure_ascii=False)
+    async def backfill(self, site, terms=None):
+        """Extract the site's articles archived in the Wayback Machine instead of using its search.
 
-        return all_articles
+        The article URLs come from CDX queries for captures made since the start of the date
+        window that match the site's ARTICLE_URL_RE; with terms, only those whose path has every word of one of
+        the terms are kept. Each page of CDX results is queued as soon as it arrives, and the
+        archived copies go through the same pipeline and seen index as the search results.
+        """
+        scraper = self.scrapers.get(site)
+        if not scraper:
+            raise ValueError(f"No scraper found for {site}")
+        if not scraper.WAYBACK_DOMAIN:
+            raise ValueError(f"{site} has no Wayback Machine URL pattern")
+
+        loop = asyncio.get_running_loop()
+        # Las consultas al CDX y la descarga de las copias se reparten el límite del archivo
+        limiter = self.rate_limiter(self.wayback.archive_url)
+        params = self.wayback.query(scraper.WAYBACK_DOMAIN, self.date_window.start, scraper.ARTICLE_URL_RE)
+        # El servidor ya filtra por el patrón, pero las páginas de un sustituto local o del caché no
+        article_url_re = re.compile(scraper.ARTICLE_URL_RE)
+        stop_words = BaseScraper.get_stop_words() if terms else set()
+        term_words = [
+            {word for word in BaseScraper.tokenize(term) if word not in stop_words} for term in terms or ()
+        ]
+        link_queue = asyncio.Queue(maxsize=self.queue_size)
+        snapshots = {}
+
+        def wanted(url):
+            if not article_url_re.fullmatch(url) or not self.date_window.may_contain_url(url):
+                return False
+            if not term_words:
+                return True
+            path_words = set(BaseScraper.tokenize(unquote(urlparse(url).path)))
+            return any(words and words <= path_words for words in term_words)
+
+        async def enqueue(rows):
+            captures = {}
+            for timestamp, url in rows:
+                if wanted(url):
+                    captures.setdefault(url, timestamp)
+            # Se reclaman las URLs originales, así que lo que ya bajó una búsqueda no se repite
+            pending = self.seen.claim_new(list(captures))
+            for url in pending:
+                snapshots[url] = self.wayback.snapshot_url(captures[url], url)
+                await link_queue.put(url)
+            return pending
+
+        async def cdx_page(resume_key):
+            with self.metrics.time(site, "cdx"):
+                return await loop.run_in_executor(self.executor, self.wayback.page, params, resume_key)
+
+        async def discovery():
+            resume_key = None
+            page_number = 0
+            while True:
+                page_number += 1
+                rows, resume_key = await limiter.run(cdx_page, resume_key)
+                pending = await enqueue(rows)
+                print(f"Wayback {site} page {page_number}: {len(rows)} captures, {len(pending)} new articles")
+                await scraper.report_page(None, page_number, pending, not resume_key)
+                if not resume_key:
+                    break
+
+        with self.metrics.time(site, "backfill"):
+            return await self.run_pipeline(site, scraper, link_queue, discovery(), None, snapshots, limiter)
+
+    async def reprocess(self, source_seen_file, sites=None):
+        """Rebuild the articles of an earlier run from the response cache, without searching the sites.
+
+        Takes the URLs processed according to source_seen_file (that run's seen index) and sends
+        their cached pages through parse, the date window, NER and tokenization into this
+        scraper's store and indexes, which should be new files. Create the scraper with
+        cache_ttl=None so that no page is revalidated; URLs without a cached page are skipped,
+        so nothing is downloaded. Backfilled articles are read from their cached archived copy.
+        Returns {site: [articles]}.
+        """
+        if self.response_cache is None:
+            raise ValueError("reprocess needs the response cache")
+        if os.path.abspath(source_seen_file) == os.path.abspath(self.seen.path):
+            raise ValueError("reprocess needs a seen index other than the source one")
+        source = SeenIndex(source_seen_file)
+        try:
+            rows = source.processed()
+        finally:
+            source.close()
+        # Las notas del Wayback Machine están en el caché con la URL de su copia archivada
+        snapshots = {}
+        for url in self.response_cache.urls():
+            match = WaybackCDX.SNAPSHOT_RE.search(url)
+            if match:
+                snapshots.setdefault(match.group(1), url)
+        urls_by_site = {}
+        for url, site in rows:
+            if site in self.scrapers and (sites is None or site in sites):
+                urls_by_site.setdefault(site, []).append(url)
+
+        all_results = {}
+        for site, urls in urls_by_site.items():
+            fetch_urls = {url: snapshots[url] for url in urls if url in snapshots}
+            cached = [url for url in urls if self.response_cache.contains(fetch_urls.get(url, url))]
+            if len(cached) < len(urls):
+                self.metrics.inc(site, "links_not_cached", len(urls) - len(cached))
+                print(f"Skipping {len(urls) - len(cached)} {site} articles without a cached page")
+            links = self.seen.claim_new(cached)
+            print(f"\nReprocesando {len(links)} artículos de {site.replace('_', ' ').title()}")
+            all_results[site] = await self.extract_articles(site, self.scrapers[site], links, None, fetch_urls)
+        return all_results
+
+    async def backfill_all(self, sites, terms=None):
+        """Run backfill() for every site at once; returns {site: {"wayback": [articles]}}."""
+        all_results = {site: {"wayback": []} for site in sites}
+
+        async def job(site):
+            print(f"\nBuscando en el Wayback Machine artículos de {site.replace('_', ' ').title()}")
+            try:
+                all_results[site]["wayback"] = await self.backfill(site, terms)
+            except Exception as e:
+                print(f"Error al recorrer el Wayback Machine en {site}: {str(e)}")
+                return
+            print(f"Se encontraron {len(all_results[site]['wayback'])} artículos archivados en {site}")
+
+        await asyncio.gather(*(job(site) for site in sites))
+        return all_results
+
+
+_worker_scrapers = {}
+_worker_matchers = {}
+
+def process_articles(site, parser_backend, items, ner_batch_size=32, ner_processes=1, match_terms=None,
+                     date_window=DEFAULT_DATE_WINDOW):
+    """Parse, locate and tokenize fetched pages; runs in the CPU worker processes.
+
+    Returns (results, metrics snapshot), with (link, article, error) in results for each
+    (link, html) item; article is None for discarded ones.
+    """
+    key = (site, parser_backend)
+    scraper = _worker_scrapers.get(key)
+    if scraper is None:
+        scraper_class, base_url = SITES[site]
+        scraper = _worker_scrapers[key] = scraper_class(base_url, parser_backend=parser_backend)
+    matcher = None
+    if match_terms:
+        # El autómata se compila una vez por proceso y lista de términos
+        matcher = _worker_matchers.get(match_terms)
+        if matcher is None:
+            matcher = _worker_matchers[match_terms] = TermMatcher(match_terms)
+    # Métricas propias de la llamada: el proceso principal las suma a las de la ejecución
+    metrics = Metrics()
+
+    results = []
+    parsed_items = []
+    for link, html in items:
+        try:
+            with metrics.time(site, "parse"):
+                parsed = scraper.parse_article(link, html)
+                in_window = date_window.contains_fecha(parsed["fecha"])
+        except Exception as e:
+            metrics.error(site, "parse", e)
+            results.append((link, None, f"{type(e).__name__}: {e}"))
+            continue
+        if in_window:
+            parsed_items.append((link, parsed))
+        else:
+            # Fuera del rango de fechas: se descarta antes de NER y del conteo de palabras
+            metrics.inc(site, "out_of_date_window")
+            results.append((link, None, None))
+    if parsed_items:
+        try:
+            start = time.perf_counter()
+            locations = BaseScraper.extract_locations_batch(
+                [parsed["text"] for _, parsed in parsed_items], ner_batch_size, ner_processes
+            )
+            # nlp.pipe procesa el lote completo; se registra lo que tocó a cada artículo
+            ner_ms = (time.perf_counter() - start) * 1000 / len(parsed_items)
+            for _ in parsed_items:
+                metrics.observe(site, "ner", ner_ms)
+        except Exception as e:
+            metrics.error(site, "ner", e)
+            results.extend((link, None, f"{type(e).__name__}: {e}") for link, _ in parsed_items)
+            return results, metrics.snapshot()
+        for (link, parsed), location in zip(parsed_items, locations):
+            try:
+                with metrics.time(site, "tokenize"):
+                    results.append((link, BaseScraper.build_article(parsed, location, matcher), None))
+            except Exception as e:
+                metrics.error(site, "tokenize", e)
+                results.append((link, None, f"{type(e).__name__}: {e}"))
+    return results, metrics.snapshot()
+
+async def run_searches(ws, newspapers, terms, wayback=False):
+    try:
+        if wayback:
+            return await ws.backfill_all(newspapers, terms)
+        # Todas las búsquedas de todos los periódicos en el mismo bucle de eventos
+        return await ws.scrape_all(newspapers, terms)
+    finally:
+        await ws.aclose()
 
 if __name__ == "__main__":
-    ws = WebScraper()
+    arg_parser = argparse.ArgumentParser(description="Scraper de noticias de El Universal, La Jornada y Milenio")
+    arg_parser.add_argument("--parser", choices=PARSER_BACKENDS, default=None,
+                            help="parser de HTML para las notas (por defecto el más rápido instalado)")
+    arg_parser.add_argument("--benchmark-parsers", metavar="DIR",
+                            help="compara los parsers sobre páginas guardadas <sitio>*.html y termina")
+    arg_parser.add_argument("--benchmark", metavar="DIR", nargs="?", const=FIXTURES_DIR,
+                            help="mide cada etapa de la extracción sobre páginas guardadas, servidas localmente, y termina")
+    arg_parser.add_argument("--export", metavar="PREFIX", nargs="?", const="V1.0_corpus",
+                            help="exporta los artículos guardados a Parquet y matriz dispersa y termina")
+    arg_parser.add_argument("--query", metavar="TERMINO",
+                            help="cuenta en el índice los artículos que mencionan el término y termina")
+    arg_parser.add_argument("--por", choices=list(InvertedIndex.GROUPS), default="month",
+                            help="agrupación de --query (por defecto, mes)")
+    arg_parser.add_argument("--diario", help="filtra --query por diario")
+    arg_parser.add_argument("--ubicacion", help="filtra --query por estado")
+    arg_parser.add_argument("--reindex", action="store_true",
+                            help="reconstruye el índice a partir de los artículos guardados y termina")
+    arg_parser.add_argument("--desde", default="01/01/2016", metavar="DD/MM/AAAA",
+                            help="descarta notas publicadas antes de esta fecha (por defecto 01/01/2016)")
+    arg_parser.add_argument("--hasta", metavar="DD/MM/AAAA",
+                            help="descarta notas publicadas después de esta fecha")
+    arg_parser.add_argument("--terminos", metavar="CSV",
+                            help="CSV con la columna TERMINOS; sin él se elige en una ventana")
+    arg_parser.add_argument("--http2", action="store_true",
+                            help="descarga las notas con HTTP/2 (requiere httpx[http2])")
+    arg_parser.add_argument("--reprocess", metavar="PREFIX",
+                            help="vuelve a procesar desde el caché, sin buscar ni descargar, las notas ya "
+                                 "procesadas, hacia PREFIX.jsonl con sus propios índices, y termina")
+    arg_parser.add_argument("--wayback", action="store_true",
+                            help="en lugar de buscar en los sitios, recorre sus notas archivadas en el Wayback "
+                                 "Machine publicadas entre --desde y --hasta cuya URL contiene alguno de los términos")
+    arg_parser.add_argument("--cdx-endpoint", default=WaybackCDX.ENDPOINT, metavar="URL",
+                            help="servidor CDX de --wayback (por ejemplo, uno local para pruebas)")
+    arg_parser.add_argument("--wayback-archive", default=WaybackCDX.ARCHIVE_URL, metavar="URL",
+                            help="de dónde se descargan las copias archivadas con --wayback")
+    arg_parser.add_argument("--recrawl-after", type=float, default=24, metavar="HORAS",
+                            help="vuelve a buscar los términos terminados hace más de HORAS horas "
+                                 "(por defecto 24; 0 los busca siempre)")
+    arg_parser.add_argument("--jobs", type=int, default=6,
+                            help="búsquedas (periódico, término) simultáneas en total")
+    arg_parser.add_argument("--jobs-per-site", type=int, default=2,
+                            help="búsquedas simultáneas en un mismo periódico")
+    args = arg_parser.parse_args()
+
+    if args.benchmark_parsers:
+        benchmark_parsers(args.benchmark_parsers)
+        sys.exit(0)
+    if args.benchmark:
+        benchmark_extraction(args.benchmark, parser_backend=args.parser)
+        sys.exit(0)
+
+    if args.reindex or args.query:
+        index = InvertedIndex()
+        if args.reindex:
+            vocabulary = Vocabulary()
+            print(f"Se indexaron {index.rebuild(ArticleStore(), vocabulary)} artículos")
+        if args.query:
+            counts = index.count(args.query, diario=args.diario, ubicacion=args.ubicacion, group_by=args.por)
+            for group, count in counts.items():
+                print(f"{group}\t{count}")
+            print(f"Total\t{sum(counts.values())}")
+        index.close()
+        sys.exit(0)
+
+    if args.export:
+        # El vocabulario solo existe si los tokens se guardaron como pares [id, conteo]
+        vocabulary = Vocabulary()
+        export_corpus(ArticleStore(), args.export, vocabulary if len(vocabulary) else None)
+        sys.exit(0)
+
+    palabras_objetivo = BaseScraper.cargar_terminos(args.terminos)
+
+    if args.reprocess:
+        # Almacén e índices nuevos; el caché se usa sin revalidar para no tocar la red
+        ws = WebScraper(output_file=f"{args.reprocess}.jsonl", seen_file=f"{args.reprocess}_seen.sqlite3",
+                        checkpoint_file=f"{args.reprocess}_checkpoint.sqlite3",
+                        index_file=f"{args.reprocess}_index.sqlite3", metrics_file=f"{args.reprocess}_metrics",
+                        cache_ttl=None, parser_backend=args.parser, match_terms=palabras_objetivo,
+                        date_window=DateWindow(args.desde, args.hasta))
+
+        async def run_reprocess():
+            try:
+                return await ws.reprocess("V1.0_seen.sqlite3")
+            finally:
+                await ws.aclose()
+
+        results = asyncio.run(run_reprocess())
+        for site, articles in results.items():
+            print(f"{site}: {len(articles)} artículos")
+        print(f"Todos los artículos han sido guardados en {ws.output_file}")
+        sys.exit(0)
+
+    ws = WebScraper(parser_backend=args.parser, max_concurrent_jobs=args.jobs,
+                    max_jobs_per_site=args.jobs_per_site, http2=args.http2, match_terms=palabras_objetivo,
+                    date_window=DateWindow(args.desde, args.hasta), recrawl_after=args.recrawl_after * 3600,
+                    wayback_endpoint=args.cdx_endpoint, wayback_archive=args.wayback_archive)
+
+    # Migrar el archivo JSON de versiones anteriores al nuevo formato JSONL
+    legacy_file = "V1.0_articles.json"
+    if os.path.exists(legacy_file) and not os.path.exists(ws.output_file):
+        print(f"Se migraron {ws.store.import_json(legacy_file)} artículos de {legacy_file}")
 
-    palabras_objetivo = BaseScraper.cargar_terminos()
-    
     # Lista de periódicos a buscar
     newspapers = [
         'el_universal',
@@ -737,30 +3512,8 @@ if __name__ == "__main__":
         #'violencia+intrafamiliar'
     ]
     
-    all_results = {}
-    
-    # Realizar búsqueda para cada periódico y término
-    for newspaper in newspapers:
-        print(f"\n=== Buscando en {newspaper.replace('_', ' ').title()} ===")
-        all_results[newspaper] = {}
-        
-        #for term in search_terms:
-        for term in palabras_objetivo:
-            try:
-                print(f"\nBuscando artículos sobre: {term}")
-                results = asyncio.run(ws.scrape(newspaper, term))
-                
-                if results is not None:
-                    all_results[newspaper][term] = results
-                    print(f"Se encontraron {len(results)} artículos para '{term}'")
-                else:
-                    print(f"No se obtuvieron resultados para '{term}'")
-                    all_results[newspaper][term] = []
-                    
-            except Exception as e:
-                print(f"Error al procesar '{term}' en {newspaper}: {str(e)}")
-                all_results[newspaper][term] = []
-            
+    # Un solo event loop para que el navegador compartido sobreviva entre términos
+    all_results = asyncio.run(run_searches(ws, newspapers, palabras_objetivo, args.wayback))
     
     # Imprimir resumen total
     print("\n====== RESUMEN TOTAL ======")
@@ -776,4 +3529,6 @@ if __name__ == "__main__":
             print(f"- {term}: {len(articles)} artículos")
     
     print(f"\nTotal general de artículos encontrados: {grand_total}")
-    print(f"Todos los artículos han sido guardados en {ws.output_file}")
\ No newline at end of file
+    print(f"Todos los artículos han sido guardados en {ws.output_file}")
+    if ws.metrics_file:
+        print(f"Métricas de la ejecución en {ws.metrics_file}.json y {ws.metrics_file}.prom")
\ No newline at end of file